@@ -6,7 +6,7 @@ from config import Config
 # Initialize extensions
 db = SQLAlchemy()
 
-def create_app(config_class=Config):
+def create_app(config_class=Config, check_schema=True):
     app = Flask(__name__)
     app.config.from_object(config_class)
     
@@ -32,6 +32,23 @@ def create_app(config_class=Config):
         # Log the tables that were created
         tables = [table_name for table_name in db.metadata.tables.keys()]
         app.logger.info(f"Created database tables: {tables}")
+        
+        # Changes create_all cannot make to existing tables are applied by upgrade_database.py;
+        # refuse to run against a half-migrated database instead of failing on the first insert.
+        # The migration scripts themselves skip the check and the registry, which reads the models.
+        if check_schema:
+            from app.models.migrations import pending_upgrades, describe_upgrade
+            pending = pending_upgrades(db.engine, db.metadata)
+            if pending:
+                raise RuntimeError(
+                    f"Database schema is out of date ({', '.join(describe_upgrade(u) for u in pending)}): "
+                    f"run upgrade_database.py"
+                )
+            
+            # Asset lookups on request paths are served from memory
+            from app.services.asset_registry import refresh_asset_registry
+            registry = refresh_asset_registry()
+            app.logger.info(f"Loaded {len(registry)} assets into the registry")
     
     @app.route('/')
     def index():
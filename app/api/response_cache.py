@@ -0,0 +1,88 @@
+import functools
+import hashlib
+import os
+import threading
+from flask import current_app, g, request
+from app import db
+from app.models.models import VolatilityRecord
+from app.services.call_cache import CallCache, create_cache_backend
+from app.services.web3_service import get_shared_web3_service
+
+_response_cache = None
+_response_cache_pid = None
+_response_cache_lock = threading.Lock()
+
+def get_response_cache():
+    """Per-process response cache built from the app config, or None when disabled"""
+    global _response_cache, _response_cache_pid
+
+    pid = os.getpid()
+    if _response_cache_pid != pid:
+        with _response_cache_lock:
+            if _response_cache_pid != pid:
+                config = current_app.config
+                backend = create_cache_backend(
+                    config.get('RESPONSE_CACHE_BACKEND'), config, 'api:response:',
+                    max_entries=config.get('RESPONSE_CACHE_MAX_ENTRIES', 256)
+                )
+                _response_cache = CallCache(backend, ttl=config.get('RESPONSE_CACHE_TTL', 300)) if backend else None
+                _response_cache_pid = pid
+    return _response_cache
+
+def _data_version(chain):
+    """
+    Version string for the data behind a response: the latest VolatilityRecord id and,
+    for endpoints that read contract state, the current block number.
+    Returns None when the block number cannot be read, so the response is not cached.
+    """
+    latest_record_id = db.session.query(db.func.max(VolatilityRecord.id)).scalar() or 0
+    if not chain:
+        return f"v{latest_record_id}"
+
+    try:
+        block_number = get_shared_web3_service().get_block_number(cached=True)
+    except Exception as e:
+        current_app.logger.warning(f"Could not read block number, bypassing response cache: {str(e)}")
+        return None
+    if block_number is None:
+        return None
+    return f"b{block_number}-v{latest_record_id}"
+
+def skip_response_cache():
+    """Keep the current request's response out of the cache, e.g. when it was built from partial data"""
+    g.skip_response_cache = True
+
+def cached_response(chain=True):
+    """
+    Cache successful JSON responses by route, arguments and data version; responses the
+    view marked with skip_response_cache() are returned as is, without an ETag.
+    The ETag is derived from the same key, so clients sending a matching If-None-Match
+    get 304 Not Modified without the view running.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = get_response_cache()
+            version = _data_version(chain)
+            if cache is None or version is None:
+                return view(*args, **kwargs)
+
+            key = request.full_path
+            etag = hashlib.sha1(f"{key}|{version}".encode()).hexdigest()
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+            else:
+                hit, body = cache.get(key, [], version)
+                if not hit:
+                    response = current_app.make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or g.pop('skip_response_cache', False):
+                        return response
+                    body = response.get_data(as_text=True)
+                    cache.set(key, [], version, body)
+                response = current_app.response_class(body, mimetype='application/json')
+
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'  # Always revalidate; 304s are cheap
+            return response
+        return wrapper
+    return decorator
@@ -1,10 +1,23 @@
-from flask import Blueprint, jsonify, request, current_app, g
+from flask import Blueprint, Response, jsonify, request, current_app, g, abort, stream_with_context
 from werkzeug.exceptions import BadRequest, NotFound
 from app import db
-from app.models.models import User, Asset, Position, Transaction, VolatilityRecord
-from app.services.web3_service import Web3Service
+from app.models.models import User, Asset, Position, Transaction, PendingTransaction, VolatilityRecord, IndexerCheckpoint
+from app.models.queries import get_user_transactions, iter_user_transactions
+from app.api.response_cache import cached_response, get_response_cache, skip_response_cache
+from app.services.web3_service import get_shared_web3_service
+from app.services.block_stream import get_shared_block_stream
 from app.services.volatility_service import VolatilityService
+from app.services.timeseries import TimeSeriesService, METRICS, RESOLUTIONS
+from app.services.event_indexer import EventIndexer, POSITION_EVENTS, to_raw_amount
+from app.services.receipt_queue import enqueue_transactions
+from app.services.asset_registry import get_asset_registry
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal, InvalidOperation
+import csv
 import functools
+import io
+import json
+import re
 
 api_bp = Blueprint('api', __name__)
 
@@ -24,9 +37,8 @@ def handle_errors(f):
     return decorated_function
 
 def get_web3_service():
-    if 'web3_service' not in g:
-        g.web3_service = Web3Service()
-    return g.web3_service
+    # One pooled service per worker process; it connects on first contract call
+    return get_shared_web3_service()
 
 def get_volatility_service():
     if 'volatility_service' not in g:
@@ -35,119 +47,341 @@ def get_volatility_service():
 
 @api_bp.before_request
 def ensure_services():
-    get_web3_service()
     get_volatility_service()
 
 @api_bp.teardown_app_request
 def teardown_services(exception=None):
-    web3_service = g.pop('web3_service', None)
     volatility_service = g.pop('volatility_service', None)
 
 # Asset endpoints
 @api_bp.route('/assets', methods=['GET'])
+@cached_response()
 def get_assets():
     """Get all active assets with their details"""
-    assets = Asset.query.filter_by(is_active=True).all()
+    # Asset metadata and latest volatility come from the in-memory registry
+    assets = get_asset_registry().active
     result = []
     
+    # Get on-chain data for every asset in one batched round trip
+    snapshot = get_web3_service().get_assets_snapshot([asset.symbol for asset in assets])
+    
     for asset in assets:
         try:
-            # Get on-chain data
-            asset_details = get_web3_service().get_asset_details(asset.symbol)
-            
-            # Get latest volatility record
-            volatility = VolatilityRecord.query.filter_by(asset_id=asset.id).order_by(VolatilityRecord.timestamp.desc()).first()
-            
-            result.append({
-                'id': asset.id,
-                'symbol': asset.symbol,
-                'name': asset.name,
-                'tokenAddress': asset.token_address,
-                'baseInterestRate': asset.base_interest_rate / 100,  # Convert basis points to percentage
-                'effectiveInterestRate': get_web3_service().get_current_interest_rate(asset.symbol) / 100,
-                'volatility': volatility.volatility if volatility else 0,
-                'collateralFactor': asset.collateral_factor / 100,  # Convert basis points to percentage
-                'totalDeposited': asset_details[1],
-                'totalBorrowed': asset_details[2],
-                'price': get_web3_service().get_asset_price(asset.symbol) / 10**8,  # Chainlink returns prices with 8 decimals
-            })
+            result.append(_serialize_asset(asset, snapshot.get(asset.symbol)))
         except Exception as e:
             current_app.logger.error(f"Error processing asset {asset.symbol}: {str(e)}")
+            # A list missing this asset must not be served again for the rest of the block
+            skip_response_cache()
     
     return jsonify(result)
 
 @api_bp.route('/assets/<string:symbol>', methods=['GET'])
+@cached_response()
 def get_asset(symbol):
     """Get details for a specific asset"""
-    asset = Asset.query.filter_by(symbol=symbol, is_active=True).first_or_404()
+    asset = get_asset_registry().get(symbol) or abort(404)
     
     try:
-        # Get on-chain data
-        asset_details = get_web3_service().get_asset_details(asset.symbol)
-        
-        # Get latest volatility record
-        volatility = VolatilityRecord.query.filter_by(asset_id=asset.id).order_by(VolatilityRecord.timestamp.desc()).first()
-        
-        result = {
-            'id': asset.id,
-            'symbol': asset.symbol,
-            'name': asset.name,
-            'tokenAddress': asset.token_address,
-            'baseInterestRate': asset.base_interest_rate / 100,
-            'effectiveInterestRate': get_web3_service().get_current_interest_rate(asset.symbol) / 100,
-            'volatility': volatility.volatility if volatility else 0,
-            'collateralFactor': asset.collateral_factor / 100,
-            'totalDeposited': asset_details[1],
-            'totalBorrowed': asset_details[2],
-            'price': get_web3_service().get_asset_price(asset.symbol) / 10**8,
-        }
-        
-        return jsonify(result)
+        # Get on-chain data in one batched round trip
+        chain_data = get_web3_service().get_assets_snapshot([asset.symbol]).get(asset.symbol)
+        return jsonify(_serialize_asset(asset, chain_data))
     except Exception as e:
         current_app.logger.error(f"Error processing asset {asset.symbol}: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+def _serialize_asset(asset, chain_data):
+    """Combine an AssetInfo with its on-chain snapshot into the API representation"""
+    if not chain_data or 'error' in chain_data:
+        raise ValueError(chain_data['error'] if chain_data else 'No on-chain data')
+    asset_details = chain_data['details']
+    
+    return {
+        'id': asset.id,
+        'symbol': asset.symbol,
+        'name': asset.name,
+        'tokenAddress': asset.token_address,
+        'baseInterestRate': asset.base_interest_rate / 100,  # Convert basis points to percentage
+        'effectiveInterestRate': chain_data['interest_rate'] / 100,
+        'volatility': asset.volatility if asset.volatility is not None else 0,
+        'collateralFactor': asset.collateral_factor / 100,  # Convert basis points to percentage
+        'totalDeposited': asset_details[1],
+        'totalBorrowed': asset_details[2],
+        'price': chain_data['price'] / 10**8,  # Chainlink returns prices with 8 decimals
+    }
+
 # User endpoints
 @api_bp.route('/users/<string:address>', methods=['GET'])
 def get_user(address):
-    """Get user details and positions"""
+    """
+    Get user positions.
+    Served from the indexed Position table when the event indexer is running;
+    pass ?fresh=1 to force a live read from the chain.
+    """
     # Validate address
     if not get_web3_service().validate_address(address):
         return jsonify({'error': 'Invalid Ethereum address'}), 400
+    address = address.lower()
+    
+    fresh = request.args.get('fresh', '').lower() in ('1', 'true', 'yes')
+    checkpoint = None
+    if not fresh and current_app.config.get('USER_POSITIONS_SOURCE', 'index') == 'index':
+        checkpoint = db.session.get(IndexerCheckpoint, EventIndexer.CHECKPOINT_NAME)
+    
+    if checkpoint is not None and checkpoint.block_hash:
+        return jsonify({
+            'address': address,
+            'positions': _get_indexed_positions(address),
+            'source': 'index',
+            'blockNumber': checkpoint.block_number
+        })
     
-    # Find or create user
-    user = User.query.filter_by(address=address.lower()).first()
-    if not user:
-        user = User(address=address.lower())
-        db.session.add(user)
-        db.session.commit()
+    return jsonify({
+        'address': address,
+        'positions': _get_live_positions(address),
+        'source': 'chain'
+    })
+
+def _get_indexed_positions(address):
+    """Positions from the Position table, with interest accrued locally like the contract does"""
+    rows = db.session.query(Position, Asset).join(
+        User, Position.user_id == User.id
+    ).join(
+        Asset, Position.asset_id == Asset.id
+    ).filter(User.address == address, Asset.is_active == True).all()
     
-    # Get user positions
-    active_assets = Asset.query.filter_by(is_active=True).all()
+    now = int(datetime.now(timezone.utc).timestamp())
+    positions = []
+    for position, asset in rows:
+        deposited = to_raw_amount(position.deposited_amount, asset.decimals)
+        borrowed = to_raw_amount(position.borrowed_amount, asset.decimals)
+        if deposited == 0 and borrowed == 0:
+            continue
+        
+        rate = asset.current_interest_rate if asset.current_interest_rate is not None else asset.base_interest_rate
+        last_update = None
+        if position.last_interest_update:
+            last_update = int(position.last_interest_update.replace(tzinfo=timezone.utc).timestamp())
+        
+        positions.append({
+            'asset': asset.symbol,
+            'deposited': deposited,
+            'borrowed': borrowed,
+            'interestDue': _calculate_interest_due(borrowed, rate, last_update, now),
+            'healthFactor': _calculate_health_factor(deposited, borrowed, asset.collateral_factor)
+        })
+    return positions
+
+def _get_live_positions(address):
+    """Positions read from the contract for every active asset in one batched round trip"""
+    active_assets = get_asset_registry().active
     positions = []
     
+    position_data = get_web3_service().get_user_positions(address, [asset.symbol for asset in active_assets])
+    
     for asset in active_assets:
+        position = position_data.get(asset.symbol)
+        if not position or 'error' in position:
+            error = position['error'] if position else 'No on-chain data'
+            current_app.logger.error(f"Error getting position for {address} - {asset.symbol}: {error}")
+            continue
+        
+        deposited, borrowed = position['deposited'], position['borrowed']
+        if deposited > 0 or borrowed > 0:
+            positions.append({
+                'asset': asset.symbol,
+                'deposited': deposited,
+                'borrowed': borrowed,
+                'interestDue': position['interest_due'],
+                'healthFactor': _calculate_health_factor(deposited, borrowed, asset.collateral_factor)
+            })
+    return positions
+
+# Types users submit through /transactions/record
+TRANSACTION_TYPES = ('deposit', 'withdraw', 'borrow', 'repay')
+# Types stored in the history, including liquidations written by the event indexer
+HISTORY_TRANSACTION_TYPES = tuple(POSITION_EVENTS.values())
+TX_HASH_PATTERN = re.compile(r'^0x[0-9a-f]{64}$')
+
+@api_bp.route('/users/<string:address>/transactions', methods=['GET'])
+@handle_errors
+def get_user_transactions_history(address):
+    """
+    Recorded transactions of a user, newest first.
+    Query parameters: asset (symbol), type (comma-separated tx types), limit, and cursor
+    (the nextCursor of the previous page). With format=ndjson or format=csv every matching
+    row is streamed instead of one page.
+    """
+    if not get_web3_service().validate_address(address):
+        raise ValueError('Invalid Ethereum address')
+    address = address.lower()
+    
+    tx_types = [t for t in (request.args.get('type') or '').split(',') if t]
+    unknown = set(tx_types) - set(HISTORY_TRANSACTION_TYPES)
+    if unknown:
+        raise ValueError(f"Unknown transaction types: {', '.join(sorted(unknown))}")
+    
+    asset_id = None
+    if request.args.get('asset'):
+        asset = get_asset_registry().get(request.args['asset'], active_only=False)
+        if asset is None:
+            raise ValueError(f"Unknown asset: {request.args['asset']}")
+        asset_id = asset.id
+    
+    export_format = request.args.get('format') or 'json'
+    if export_format not in ('json', 'ndjson', 'csv'):
+        raise ValueError('Format must be one of: json, ndjson, csv')
+    
+    user_id = db.session.query(User.id).filter_by(address=address).scalar()
+    
+    if export_format != 'json':
+        rows = iter_user_transactions(user_id, asset_id, tx_types) if user_id is not None else iter(())
+        return _export_transactions(address, rows, export_format)
+    
+    max_limit = current_app.config.get('MAX_HISTORY_PAGE_SIZE', 500)
+    try:
+        limit = min(int(request.args.get('limit') or 100), max_limit)
+    except ValueError:
+        raise ValueError('Limit must be an integer')
+    if limit < 1:
+        raise ValueError('Limit must be positive')
+    
+    before = None
+    if request.args.get('cursor'):
         try:
-            # Get on-chain position data
-            position_data = get_web3_service().get_user_position(address, asset.symbol)
-            deposited, borrowed, interest_due = position_data
-            
-            if deposited > 0 or borrowed > 0:
-                positions.append({
-                    'asset': asset.symbol,
-                    'deposited': deposited,
-                    'borrowed': borrowed,
-                    'interestDue': interest_due,
-                    'healthFactor': _calculate_health_factor(deposited, borrowed, asset.collateral_factor)
-                })
-        except Exception as e:
-            current_app.logger.error(f"Error getting position for {address} - {asset.symbol}: {str(e)}")
+            before = tuple(int(part) for part in request.args['cursor'].split(':'))
+        except ValueError:
+            raise ValueError('Invalid cursor')
+        if len(before) != 2:
+            raise ValueError('Invalid cursor')
+    
+    rows = get_user_transactions(user_id, asset_id, tx_types, before, limit + 1) if user_id is not None else []
+    next_cursor = f"{rows[limit - 1].block_number}:{rows[limit - 1].id}" if len(rows) > limit else None
     
     return jsonify({
-        'address': user.address,
-        'positions': positions
+        'address': address,
+        'transactions': [_serialize_transaction(row) for row in rows[:limit]],
+        'nextCursor': next_cursor
+    })
+
+def _serialize_transaction(row):
+    """Amounts are decimal strings in token units, as stored"""
+    return {
+        'id': row.id,
+        'txHash': row.tx_hash,
+        'type': row.tx_type,
+        'asset': row.symbol,
+        'amount': str(row.amount),
+        'interestAmount': str(row.interest_amount or 0),
+        'blockNumber': row.block_number,
+        'timestamp': row.timestamp.isoformat() if row.timestamp else None
+    }
+
+def _export_transactions(address, rows, export_format):
+    """Stream transactions as NDJSON or CSV without holding more than one page in memory"""
+    def chunks():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer) if export_format == 'csv' else None
+        if writer is not None:
+            writer.writerow(['id', 'txHash', 'type', 'asset', 'amount', 'interestAmount', 'blockNumber', 'timestamp'])
+        for row in rows:
+            data = _serialize_transaction(row)
+            if writer is not None:
+                writer.writerow(data.values())
+            else:
+                buffer.write(json.dumps(data) + '\n')
+            # Send roughly 64 KiB at a time rather than one write per row
+            if buffer.tell() > 65536:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    
+    mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    return Response(stream_with_context(chunks()), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename="{address}-transactions.{export_format}"',
+        'X-Accel-Buffering': 'no'
     })
 
+# Streaming endpoint
+@api_bp.route('/stream', methods=['GET'])
+def stream_updates():
+    """
+    Server-sent events with asset state and, with ?address=, that user's positions.
+    Events are only sent when the data changed in a new block; all clients share one
+    chain read per block.
+    """
+    address = request.args.get('address')
+    if address is not None:
+        if not get_web3_service().validate_address(address):
+            return jsonify({'error': 'Invalid Ethereum address'}), 400
+        address = address.lower()
+    
+    block_stream = get_shared_block_stream(_build_stream_update)
+    subscription = block_stream.subscribe(address)
+    keepalive = current_app.config.get('STREAM_KEEPALIVE', 15)
+    
+    def events():
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                event = subscription.get(timeout=keepalive)
+                if event is None:
+                    yield ': keepalive\n\n'
+                    continue
+                name, block_number, data = event
+                yield f"event: {name}\nid: {block_number}\ndata: {data}\n\n"
+        finally:
+            block_stream.unsubscribe(subscription)
+    
+    return Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+def _build_stream_update(addresses):
+    """Asset list and positions of every streamed address, read in two batched round trips"""
+    web3_service = get_web3_service()
+    assets = get_asset_registry().active
+    snapshot = web3_service.get_assets_snapshot([asset.symbol for asset in assets])
+    
+    asset_payload = []
+    for asset in assets:
+        try:
+            asset_payload.append(_serialize_asset(asset, snapshot.get(asset.symbol)))
+        except Exception as e:
+            current_app.logger.error(f"Error processing asset {asset.symbol}: {str(e)}")
+    
+    pairs = [(address, asset.symbol) for address in addresses for asset in assets]
+    states = web3_service.get_position_states(pairs) if pairs else []
+    assets_by_symbol = {asset.symbol: asset for asset in assets}
+    now = int(datetime.now(timezone.utc).timestamp())
+    
+    positions = {address: [] for address in addresses}
+    for (address, symbol), state in zip(pairs, states):
+        if isinstance(state, Exception):
+            current_app.logger.error(f"Error getting position for {address} - {symbol}: {state}")
+            continue
+        
+        deposited, borrowed, last_interest_update, _ = state
+        if deposited == 0 and borrowed == 0:
+            continue
+        
+        asset = assets_by_symbol[symbol]
+        chain_data = snapshot.get(symbol) or {}
+        rate = chain_data.get('interest_rate', asset.current_interest_rate or asset.base_interest_rate)
+        positions[address].append({
+            'asset': symbol,
+            'deposited': deposited,
+            'borrowed': borrowed,
+            'interestDue': _calculate_interest_due(borrowed, rate, last_interest_update, now),
+            'healthFactor': _calculate_health_factor(deposited, borrowed, asset.collateral_factor)
+        })
+    
+    return asset_payload, {
+        address: {'address': address, 'positions': user_positions, 'source': 'stream'}
+        for address, user_positions in positions.items()
+    }
+
 # Transaction preparation endpoints
 @api_bp.route('/transactions/deposit', methods=['POST'])
 @handle_errors
@@ -209,64 +443,116 @@ def prepare_repay():
     tx_data = get_web3_service().create_repay_transaction(address, symbol, amount)
     return jsonify(tx_data)
 
+@api_bp.route('/transactions/fees', methods=['GET'])
+def get_fee_suggestion():
+    """Slow/standard/fast EIP-1559 fee suggestion shared by all prepared transactions"""
+    return jsonify(get_web3_service().get_fee_suggestion())
+
+@api_bp.route('/transactions/batch', methods=['POST'])
+@handle_errors
+def prepare_batch():
+    """Prepare several operations for one user against a shared on-chain snapshot"""
+    data = request.json
+    if not data or 'address' not in data or not isinstance(data.get('operations'), list) or not data['operations']:
+        raise ValueError('Missing required parameters')
+    
+    operations = data['operations']
+    max_operations = current_app.config.get('MAX_BATCH_OPERATIONS', 20)
+    if len(operations) > max_operations:
+        raise ValueError(f'At most {max_operations} operations per batch')
+    for i, operation in enumerate(operations):
+        if not isinstance(operation, dict) or not all(k in operation for k in ['type', 'symbol', 'amount']):
+            raise ValueError(f'Operation {i}: missing required parameters')
+    
+    return jsonify(get_web3_service().create_batch_transactions(data['address'], operations))
+
 @api_bp.route('/transactions/record', methods=['POST'])
 @handle_errors
 def record_transaction():
-    """Record a successful transaction"""
+    """
+    Queue submitted transactions for recording.
+    Takes one record or {"transactions": [...]} with up to MAX_RECORD_BATCH records, and
+    returns immediately with 202. Recording is idempotent per txHash; a hash whose entry
+    failed or was dropped can be recorded again. confirm_transactions.py records each
+    transaction from its receipt once it is RECEIPT_CONFIRMATIONS blocks deep; poll
+    /transactions/record/<txHash> for the outcome.
+    """
     data = request.json
-    if not data or not all(k in data for k in ['txHash', 'txType', 'address', 'symbol', 'amount']):
+    if not data:
         raise BadRequest('Missing required parameters')
-
-    tx_hash = data['txHash']
-    tx_type = data['txType']
-    address = data['address']
-    symbol = data['symbol']
-    amount = data['amount']
-
-    # Validate transaction types
-    valid_tx_types = ['deposit', 'withdraw', 'borrow', 'repay']
-    if tx_type not in valid_tx_types:
-        raise BadRequest('Invalid transaction type')
-
-    # Get transaction receipt to confirm transaction
-    receipt = get_web3_service().get_transaction_receipt(tx_hash)
-    if not receipt or receipt['status'] != 1:
-        raise BadRequest('Transaction failed or not found')
-
-    # Get user and asset
-    user = User.query.filter_by(address=address.lower()).first()
-    if not user:
-        user = User(address=address.lower())
-        db.session.add(user)
-
-    asset = Asset.query.filter_by(symbol=symbol, is_active=True).first()
-    if not asset:
-        raise NotFound('Asset not found')
-
-    # Record transaction
-    transaction = Transaction(
-        user_id=user.id,
-        asset_id=asset.id,
-        tx_type=tx_type,
-        amount=amount,
-        tx_hash=tx_hash,
-        block_number=receipt['blockNumber']
-    )
-
+    
+    batch = isinstance(data, dict) and 'transactions' in data
+    records = data['transactions'] if batch else [data]
+    if not isinstance(records, list) or not records:
+        raise ValueError('transactions must be a non-empty list')
+    if len(records) > current_app.config.get('MAX_RECORD_BATCH', 500):
+        raise ValueError(f"At most {current_app.config.get('MAX_RECORD_BATCH', 500)} transactions per request")
+    
+    active_symbols = set(get_asset_registry().active_symbols())
+    parsed = []
+    for i, record in enumerate(records):
+        try:
+            parsed.append(_parse_record(record, active_symbols))
+        except ValueError as e:
+            raise ValueError(f"Transaction {i}: {str(e)}" if batch else str(e))
+    
+    pending = enqueue_transactions(parsed)
+    if not batch:
+        return jsonify(_serialize_pending_transaction(pending[0])), 202
+    return jsonify({'transactions': [_serialize_pending_transaction(entry) for entry in pending]}), 202
+
+def _parse_record(record, active_symbols):
+    """Validate one record body and convert it to PendingTransaction columns"""
+    if not isinstance(record, dict) or not all(k in record for k in ['txHash', 'txType', 'address', 'symbol', 'amount']):
+        raise ValueError('Missing required parameters')
+    
+    if not isinstance(record['txType'], str) or record['txType'] not in TRANSACTION_TYPES:
+        raise ValueError('Invalid transaction type')
+    if not isinstance(record['txHash'], str) or not TX_HASH_PATTERN.match(record['txHash'].lower()):
+        raise ValueError('Invalid transaction hash')
+    if not isinstance(record['address'], str) or not get_web3_service().validate_address(record['address']):
+        raise ValueError('Invalid Ethereum address')
+    if not isinstance(record['symbol'], str) or record['symbol'] not in active_symbols:
+        raise ValueError(f"Unknown asset: {record['symbol']}")
+    if isinstance(record['amount'], (bool, float)) or not isinstance(record['amount'], (str, int)):
+        raise ValueError('Invalid amount')
     try:
-        db.session.add(transaction)
-        db.session.commit()
-        return jsonify({'success': True, 'id': transaction.id})
-    except Exception as e:
-        db.session.rollback()
-        current_app.logger.error(f"Database error: {str(e)}")
-        raise
+        amount = Decimal(str(record['amount']))
+    except InvalidOperation:
+        raise ValueError('Invalid amount')
+    # Amounts are the contract's raw integer units (uint256), as passed to the prepare endpoints
+    if not amount.is_finite() or amount != amount.to_integral_value() or not 0 < amount < 2**256:
+        raise ValueError('Invalid amount')
+    
+    return {
+        'tx_hash': record['txHash'].lower(),
+        'tx_type': record['txType'],
+        'address': record['address'].lower(),
+        'symbol': record['symbol'],
+        'amount': amount
+    }
+
+@api_bp.route('/transactions/record/<string:tx_hash>', methods=['GET'])
+@handle_errors
+def get_recorded_transaction(tx_hash):
+    """Confirmation status of a queued transaction: pending, mined, confirmed, failed or dropped"""
+    pending = PendingTransaction.query.filter_by(tx_hash=tx_hash.lower()).first_or_404()
+    return jsonify(_serialize_pending_transaction(pending))
+
+def _serialize_pending_transaction(pending):
+    return {
+        'txHash': pending.tx_hash,
+        'status': pending.status,
+        'blockNumber': pending.block_number,
+        'error': pending.error
+    }
 
 # Volatility endpoints
 @api_bp.route('/volatility/<string:symbol>', methods=['GET'])
+@cached_response(chain=False)
 def get_volatility_history(symbol):
     """Get volatility history for an asset"""
-    asset = Asset.query.filter_by(symbol=symbol, is_active=True).first_or_404()
+    asset = get_asset_registry().get(symbol) or abort(404)
     
     # Get volatility records
     records = VolatilityRecord.query.filter_by(asset_id=asset.id).order_by(VolatilityRecord.timestamp.desc()).limit(30).all()
@@ -279,13 +565,93 @@ def get_volatility_history(symbol):
     
     return jsonify(result)
 
+@api_bp.route('/timeseries/<string:symbol>', methods=['GET'])
+@handle_errors
+def get_timeseries(symbol):
+    """
+    Bucketed volatility, rate, utilization and price history for an asset.
+    Query parameters: metrics (comma-separated, default all), from/to (ISO 8601 or unix
+    seconds, default the last 30 days), resolution (1h, 1d or auto), limit, and cursor
+    (the nextCursor of the previous page).
+    """
+    asset = get_asset_registry().get(symbol) or abort(404)
+    
+    metrics = [m for m in (request.args.get('metrics') or ','.join(METRICS)).split(',') if m]
+    unknown = set(metrics) - set(METRICS)
+    if unknown:
+        raise ValueError(f"Unknown metrics: {', '.join(sorted(unknown))}")
+    
+    end = _parse_time(request.args.get('to')) or datetime.utcnow()
+    start = _parse_time(request.args.get('from')) or end - timedelta(days=30)
+    if start >= end:
+        raise ValueError("'from' must be before 'to'")
+    
+    resolution = request.args.get('resolution') or 'auto'
+    if resolution == 'auto':
+        resolution = '1h' if end - start <= timedelta(days=current_app.config['TIMESERIES_HOURLY_MAX_DAYS']) else '1d'
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Resolution must be one of: auto, {', '.join(RESOLUTIONS)}")
+    
+    max_points = current_app.config['TIMESERIES_MAX_POINTS']
+    limit = min(int(request.args.get('limit') or max_points), max_points)
+    if limit < 1:
+        raise ValueError("Limit must be positive")
+    
+    points, next_cursor = TimeSeriesService().query(
+        asset.id, metrics, resolution, start, end, limit, after=_parse_time(request.args.get('cursor'))
+    )
+    return jsonify({
+        'symbol': asset.symbol,
+        'resolution': resolution,
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'points': points,
+        'nextCursor': next_cursor.isoformat() if next_cursor else None
+    })
+
+def _parse_time(value):
+    """Naive UTC datetime from an ISO 8601 string or unix seconds; None when absent"""
+    if not value:
+        return None
+    try:
+        if value.replace('.', '', 1).isdigit():
+            return datetime.utcfromtimestamp(float(value))
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f"Invalid time: {value}")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
 # Health check endpoint
 @api_bp.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
-    return jsonify({'status': 'healthy', 'message': 'API is running'}), 200
+    """Health check endpoint; provider breaker states are reported without contacting the node"""
+    return jsonify({
+        'status': 'healthy',
+        'message': 'API is running',
+        'providers': get_web3_service().provider_status()
+    }), 200
+
+@api_bp.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """Hit/miss counters for the on-chain view call cache and the API response cache"""
+    stats = get_web3_service().cache_stats()
+    response_cache = get_response_cache()
+    stats['responses'] = response_cache.stats() if response_cache else {'backend': 'none'}
+    return jsonify(stats)
 
 # Helper functions
+YEAR_IN_SECONDS = 31536000  # Matches DynamicLendingPool.YEAR_IN_SECONDS
+
+def _calculate_interest_due(borrowed, interest_rate, last_interest_update, now):
+    """Interest accrued since the last update, using the contract's _calculateInterestDue formula"""
+    if borrowed == 0 or not last_interest_update or not interest_rate:
+        return 0
+    
+    time_elapsed = max(0, now - last_interest_update)
+    return (borrowed * interest_rate * time_elapsed) // (YEAR_IN_SECONDS * 10000)
+
 def _calculate_health_factor(deposited, borrowed, collateral_factor):
     """Calculate health factor for a position"""
     if borrowed == 0:
@@ -0,0 +1,120 @@
+import logging
+from sqlalchemy import bindparam, inspect, text
+
+logger = logging.getLogger(__name__)
+
+# Columns added to existing tables after their first release: (table, column, DDL type)
+ADDED_COLUMNS = [
+    ('assets', 'current_interest_rate', 'INTEGER'),
+]
+
+# Unique indexes added after release, with the column ordering which row of a duplicate group
+# is kept. Existing duplicates are only removed by remove_duplicates (dedupe_database.py);
+# until then upgrade_schema skips the index and the app refuses to start.
+UNIQUE_INDEX_DEDUPES = {
+    # The same transaction recorded twice; the first row is as good as any
+    'uq_transactions_tx_hash': ('transactions', ['tx_hash'], 'id ASC'),
+    # The most recently updated row carries the latest contract state
+    'uq_positions_user_asset': ('positions', ['user_id', 'asset_id'], 'updated_at DESC, id DESC'),
+}
+
+# Indexes superseded by wider ones declared on the models
+DROPPED_INDEXES = {
+    'ix_transactions_user_asset_block': 'transactions',
+}
+
+def pending_upgrades(engine, metadata):
+    """
+    Schema changes an existing database is missing, as (kind, table, name) tuples where kind
+    is 'column', 'index' or 'drop'. Nothing is changed.
+    """
+    inspector = inspect(engine)
+    pending = []
+    
+    for table, column, ddl_type in ADDED_COLUMNS:
+        if column not in {col['name'] for col in inspector.get_columns(table)}:
+            pending.append(('column', table, column))
+    
+    # Indexes declared on the models but missing from tables created before they existed
+    for table in metadata.sorted_tables:
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        pending.extend(('index', table.name, index.name) for index in table.indexes if index.name not in existing)
+    
+    for index_name, table in DROPPED_INDEXES.items():
+        if index_name in {index['name'] for index in inspector.get_indexes(table)}:
+            pending.append(('drop', table, index_name))
+    
+    return pending
+
+def describe_upgrade(upgrade):
+    """Short label for a pending_upgrades entry, e.g. assets.current_interest_rate"""
+    kind, table, name = upgrade
+    if kind == 'column':
+        return f'{table}.{name}'
+    return f'-{name}' if kind == 'drop' else name
+
+def upgrade_schema(engine, metadata):
+    """
+    Apply pending_upgrades (upgrade_database.py). Unique indexes blocked by duplicate rows are
+    skipped and stay pending until dedupe_database.py has removed them. Returns the applied
+    upgrades' labels.
+    """
+    indexes = {index.name: index for table in metadata.sorted_tables for index in table.indexes}
+    ddl_types = {(table, column): ddl_type for table, column, ddl_type in ADDED_COLUMNS}
+    applied = []
+    
+    pending = pending_upgrades(engine, metadata)
+    with engine.begin() as conn:
+        for kind, table, name in pending:
+            if kind == 'column':
+                conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {name} {ddl_types[(table, name)]}'))
+            elif kind == 'index':
+                if name in UNIQUE_INDEX_DEDUPES and _duplicate_rows(conn, *UNIQUE_INDEX_DEDUPES[name]):
+                    logger.warning(
+                        f"Not creating {name}: {table} has duplicate rows. "
+                        f"Review them with dedupe_database.py --dry-run, then run dedupe_database.py"
+                    )
+                    continue
+                indexes[name].create(conn, checkfirst=True)
+            else:
+                conn.execute(text(f'DROP INDEX {name}'))
+            applied.append(describe_upgrade((kind, table, name)))
+    
+    return applied
+
+def remove_duplicates(engine, metadata, dry_run=False):
+    """
+    Delete rows that block the unique indexes in UNIQUE_INDEX_DEDUPES, logging every deleted
+    row, then create the indexes. With dry_run nothing is changed. Returns the number of
+    rows deleted (or that would be) per index.
+    """
+    indexes = {index.name: index for table in metadata.sorted_tables for index in table.indexes}
+    removed = {}
+    
+    with engine.begin() as conn:
+        for index_name, (table, columns, keep_order) in UNIQUE_INDEX_DEDUPES.items():
+            rows = _duplicate_rows(conn, table, columns, keep_order)
+            for row in rows:
+                values = {key: value for key, value in row._mapping.items() if key != 'duplicate_rank'}
+                logger.info(f"{'Would delete' if dry_run else 'Deleting'} duplicate {table} row {values}")
+            removed[index_name] = len(rows)
+            if dry_run:
+                continue
+            
+            ids = [row.id for row in rows]
+            for start in range(0, len(ids), 500):
+                conn.execute(
+                    text(f'DELETE FROM {table} WHERE id IN :ids').bindparams(bindparam('ids', expanding=True)),
+                    {'ids': ids[start:start + 500]}
+                )
+            indexes[index_name].create(conn, checkfirst=True)
+    
+    return removed
+
+def _duplicate_rows(conn, table, columns, keep_order):
+    """Every row of a duplicate group except the one `keep_order` ranks first"""
+    key = ', '.join(columns)
+    return conn.execute(text(
+        f'SELECT * FROM (SELECT *, ROW_NUMBER() OVER (PARTITION BY {key} ORDER BY {keep_order}) AS duplicate_rank '
+        f'FROM {table}) ranked WHERE duplicate_rank > 1 ORDER BY {key}'
+    )).all()
@@ -26,6 +26,7 @@ class Asset(db.Model):
     base_interest_rate = db.Column(db.Integer, nullable=False)  # Basis points (1/100 of a percent)
     volatility_multiplier = db.Column(db.Integer, nullable=False)
     collateral_factor = db.Column(db.Integer, nullable=False)  # Basis points
+    current_interest_rate = db.Column(db.Integer)  # Basis points, last on-chain rate seen by the event indexer
     is_active = db.Column(db.Boolean, default=True)
     coingecko_id = db.Column(db.String(50))  # For price data fetching
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -40,6 +41,10 @@ class Asset(db.Model):
 
 class Position(db.Model):
     __tablename__ = 'positions'
+    __table_args__ = (
+        db.Index('uq_positions_user_asset', 'user_id', 'asset_id', unique=True),
+        db.Index('ix_positions_updated_at', 'updated_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -55,11 +60,22 @@ class Position(db.Model):
 
 class Transaction(db.Model):
     __tablename__ = 'transactions'
+    __table_args__ = (
+        db.Index('uq_transactions_tx_hash', 'tx_hash', unique=True),
+        # History pages are read newest first by (block_number, id) within these prefixes. The
+        # indexes give the page order and bound the scan to `limit` entries; they do not cover
+        # the query, so the matching rows are still fetched from the table and joined to assets
+        db.Index('ix_transactions_user_block_id', 'user_id', 'block_number', 'id'),
+        db.Index('ix_transactions_user_asset_block_id', 'user_id', 'asset_id', 'block_number', 'id'),
+        db.Index('ix_transactions_user_type_block_id', 'user_id', 'tx_type', 'block_number', 'id'),
+        db.Index('ix_transactions_asset_block', 'asset_id', 'block_number'),
+        db.Index('ix_transactions_block_number', 'block_number'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     asset_id = db.Column(db.Integer, db.ForeignKey('assets.id'), nullable=False)
-    tx_type = db.Column(db.String(20), nullable=False)  # deposit, withdraw, borrow, repay
+    tx_type = db.Column(db.String(20), nullable=False)  # deposit, withdraw, borrow, repay or liquidated
     amount = db.Column(db.Numeric(precision=36, scale=18), nullable=False)
     interest_amount = db.Column(db.Numeric(precision=36, scale=18), default=0)
     tx_hash = db.Column(db.String(66), nullable=False)
@@ -73,8 +89,33 @@ class Transaction(db.Model):
     def __repr__(self):
         return f'<Transaction {self.tx_type} {self.tx_hash}>'
 
+class PendingTransaction(db.Model):
+    __tablename__ = 'pending_transactions'
+    __table_args__ = (
+        db.Index('uq_pending_transactions_tx_hash', 'tx_hash', unique=True),
+        db.Index('ix_pending_transactions_status_id', 'status', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    tx_hash = db.Column(db.String(66), nullable=False)
+    tx_type = db.Column(db.String(20), nullable=False)
+    address = db.Column(db.String(42), nullable=False)
+    symbol = db.Column(db.String(20), nullable=False)
+    amount = db.Column(db.Numeric(precision=78, scale=0), nullable=False)  # Raw integer amount as submitted, up to uint256
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, mined, confirmed, failed or dropped
+    block_number = db.Column(db.Integer)  # Block the receipt was last seen in
+    error = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<PendingTransaction {self.status} {self.tx_hash}>'
+
 class VolatilityRecord(db.Model):
     __tablename__ = 'volatility_records'
+    __table_args__ = (
+        db.Index('ix_volatility_records_asset_timestamp', 'asset_id', 'timestamp'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     asset_id = db.Column(db.Integer, db.ForeignKey('assets.id'), nullable=False)
@@ -83,5 +124,77 @@ class VolatilityRecord(db.Model):
     effective_interest_rate = db.Column(db.Integer, nullable=False)  # Resulting interest rate in basis points
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     
+    @classmethod
+    def latest_subquery(cls, asset_ids=None):
+        """Latest record per asset (newest timestamp, then highest id) as a subquery, ranked with a window function"""
+        ranked = db.select(
+            cls.id,
+            cls.asset_id,
+            cls.volatility,
+            cls.effective_interest_rate,
+            cls.timestamp,
+            db.func.row_number().over(
+                partition_by=cls.asset_id,
+                order_by=(cls.timestamp.desc(), cls.id.desc())
+            ).label('rank')
+        )
+        if asset_ids is not None:
+            ranked = ranked.where(cls.asset_id.in_(list(asset_ids)))
+        ranked = ranked.subquery()
+        return db.select(ranked).where(ranked.c.rank == 1).subquery()
+    
+    @classmethod
+    def latest_for_assets(cls, asset_ids=None):
+        """Latest record per asset in a single query, as a dict keyed by asset_id"""
+        latest = cls.latest_subquery(asset_ids)
+        records = cls.query.join(latest, cls.id == latest.c.id).all()
+        return {record.asset_id: record for record in records}
+    
+    def __repr__(self):
+        return f'<VolatilityRecord {self.asset_id} {self.volatility}>'
+
+class PriceRecord(db.Model):
+    __tablename__ = 'price_records'
+    __table_args__ = (
+        db.UniqueConstraint('coin_id', 'timestamp', name='uq_price_records_coin_timestamp'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    coin_id = db.Column(db.String(50), nullable=False)  # CoinGecko id, matches Asset.coingecko_id
+    timestamp = db.Column(db.DateTime, nullable=False)  # Start of the UTC day the price belongs to
+    price = db.Column(db.Float, nullable=False)  # USD
+    
+    def __repr__(self):
+        return f'<PriceRecord {self.coin_id} {self.timestamp:%Y-%m-%d} {self.price}>'
+
+class MetricRollup(db.Model):
+    __tablename__ = 'metric_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('asset_id', 'metric', 'resolution', 'bucket', name='uq_metric_rollups_bucket'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    asset_id = db.Column(db.Integer, db.ForeignKey('assets.id'), nullable=False)
+    metric = db.Column(db.String(20), nullable=False)  # volatility, rate (percent), utilization (0-1) or price (USD)
+    resolution = db.Column(db.String(4), nullable=False)  # 1h or 1d
+    bucket = db.Column(db.DateTime, nullable=False)  # Start of the UTC hour or day
+    samples = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Float, nullable=False, default=0)  # Sum of samples, for the bucket average
+    minimum = db.Column(db.Float, nullable=False)
+    maximum = db.Column(db.Float, nullable=False)
+    last = db.Column(db.Float, nullable=False)
+    last_at = db.Column(db.DateTime, nullable=False)  # Timestamp of the sample in `last`
+    
+    def __repr__(self):
+        return f'<MetricRollup {self.asset_id} {self.metric} {self.resolution} {self.bucket:%Y-%m-%d %H:%M}>'
+
+class IndexerCheckpoint(db.Model):
+    __tablename__ = 'indexer_checkpoints'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    block_number = db.Column(db.Integer, nullable=False)  # Last fully indexed block
+    block_hash = db.Column(db.String(66))  # Used to detect reorgs below the checkpoint
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
     def __repr__(self):
-        return f'<VolatilityRecord {self.asset.symbol} {self.volatility}>'
\ No newline at end of file
+        return f'<IndexerCheckpoint {self.name} {self.block_number}>'
\ No newline at end of file
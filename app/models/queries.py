@@ -0,0 +1,54 @@
+from app import db
+from app.models.models import Asset, Transaction
+
+class TransactionRow:
+    """Read-only view of a recorded transaction with its asset symbol"""
+    
+    __slots__ = (
+        'id', 'tx_hash', 'tx_type', 'symbol', 'amount', 'interest_amount', 'block_number', 'timestamp'
+    )
+    
+    def __init__(self, row):
+        for name, value in zip(self.__slots__, row):
+            setattr(self, name, value)
+    
+    def __repr__(self):
+        return f'<TransactionRow {self.tx_type} {self.tx_hash}>'
+
+def get_user_transactions(user_id, asset_id=None, tx_types=None, before=None, limit=100):
+    """
+    One page of a user's transactions, newest first.
+    Keyset paginated on (block_number, id): `before` is the pair of the last row of the
+    previous page, so every page seeks into the user's ordered index entries and reads only
+    `limit` of them (plus their table rows) no matter how deep it is.
+    """
+    query = db.select(
+        Transaction.id,
+        Transaction.tx_hash,
+        Transaction.tx_type,
+        Asset.symbol,
+        Transaction.amount,
+        Transaction.interest_amount,
+        Transaction.block_number,
+        Transaction.timestamp
+    ).join(Asset, Asset.id == Transaction.asset_id).where(Transaction.user_id == user_id)
+    
+    if asset_id is not None:
+        query = query.where(Transaction.asset_id == asset_id)
+    if tx_types:
+        query = query.where(Transaction.tx_type.in_(tx_types))
+    if before is not None:
+        query = query.where(db.tuple_(Transaction.block_number, Transaction.id) < tuple(before))
+    
+    query = query.order_by(Transaction.block_number.desc(), Transaction.id.desc()).limit(limit)
+    return [TransactionRow(row) for row in db.session.execute(query)]
+
+def iter_user_transactions(user_id, asset_id=None, tx_types=None, batch_size=1000):
+    """All of a user's matching transactions, newest first, fetched one keyset page at a time"""
+    before = None
+    while True:
+        rows = get_user_transactions(user_id, asset_id, tx_types, before, batch_size)
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        before = (rows[-1].block_number, rows[-1].id)
@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+from flask import current_app
+from app import db
+from app.models.models import Asset, VolatilityRecord
+
+ASSET_FIELDS = [
+    'id', 'symbol', 'name', 'token_address', 'price_feed_address', 'decimals', 'base_interest_rate',
+    'volatility_multiplier', 'collateral_factor', 'current_interest_rate', 'is_active', 'coingecko_id'
+]
+
+# Immutable copy of one Asset row with the volatility of its latest VolatilityRecord (None if it has none)
+AssetInfo = namedtuple('AssetInfo', ASSET_FIELDS + ['volatility'])
+
+_registry = None
+_refresh_lock = threading.Lock()
+_refresher = None
+_refresher_lock = threading.Lock()
+
+class AssetRegistry:
+    """
+    Read-only snapshot of the assets table, keyed by symbol and by id.
+    Snapshots are never modified; a refresh builds a new one and swaps it in whole, so
+    readers always see a consistent set of assets without locking.
+    """
+
+    def __init__(self, assets, loaded_at=None):
+        assets = sorted(assets, key=lambda asset: asset.id)
+        self._by_symbol = MappingProxyType({asset.symbol: asset for asset in assets})
+        self._by_id = MappingProxyType({asset.id: asset for asset in assets})
+        self.active = tuple(asset for asset in assets if asset.is_active)
+        self.loaded_at = time.monotonic() if loaded_at is None else loaded_at
+
+    @classmethod
+    def load(cls):
+        """Build a snapshot from the database in one query"""
+        latest = VolatilityRecord.latest_subquery()
+        columns = [getattr(Asset, field) for field in ASSET_FIELDS]
+        query = db.session.query(*columns, latest.c.volatility).outerjoin(latest, latest.c.asset_id == Asset.id)
+        return cls(AssetInfo(*row) for row in query)
+
+    def get(self, symbol, active_only=True):
+        """Asset with `symbol`, or None if unknown (or inactive, unless active_only is False)"""
+        asset = self._by_symbol.get(symbol)
+        if asset is None or (active_only and not asset.is_active):
+            return None
+        return asset
+
+    def by_id(self, asset_id):
+        return self._by_id.get(asset_id)
+
+    def active_symbols(self):
+        return [asset.symbol for asset in self.active]
+
+    def __len__(self):
+        return len(self._by_id)
+
+def refresh_asset_registry():
+    """Reload the process-wide registry from the database and swap it in"""
+    global _registry
+    registry = AssetRegistry.load()
+    _registry = registry
+    return registry
+
+def get_asset_registry():
+    """
+    The process-wide registry, loaded on first use. A background thread reloads it every
+    ASSET_REGISTRY_REFRESH seconds, so requests never wait on the database for it.
+    """
+    _ensure_refresher()
+    registry = _registry
+    if registry is None:
+        with _refresh_lock:
+            registry = _registry if _registry is not None else refresh_asset_registry()
+    return registry
+
+def _ensure_refresher():
+    """Start this process's refresh thread; threads do not survive a fork, so workers start their own"""
+    global _refresher
+    if _refresher is None or not _refresher.is_alive():
+        with _refresher_lock:
+            if _refresher is None or not _refresher.is_alive():
+                app = current_app._get_current_object()
+                _refresher = threading.Thread(
+                    target=_refresh_forever,
+                    args=(app, app.config.get('ASSET_REGISTRY_REFRESH', 60)),
+                    name='asset-registry-refresh',
+                    daemon=True
+                )
+                _refresher.start()
+
+def _refresh_forever(app, interval):
+    with app.app_context():
+        while True:
+            time.sleep(interval)
+            try:
+                refresh_asset_registry()
+            except Exception as e:
+                app.logger.error(f"Could not refresh asset registry, keeping the previous one: {str(e)}")
+            finally:
+                db.session.remove()
@@ -0,0 +1,159 @@
+import json
+import os
+import queue
+import threading
+from flask import current_app
+from app import db
+from app.services.web3_service import get_shared_web3_service
+
+_shared_stream = None
+_shared_stream_pid = None
+_shared_stream_lock = threading.Lock()
+
+def get_shared_block_stream(build_update):
+    """The process-wide BlockStream, created on first use and rebuilt after a fork"""
+    global _shared_stream, _shared_stream_pid
+
+    pid = os.getpid()
+    if _shared_stream is None or _shared_stream_pid != pid:
+        with _shared_stream_lock:
+            if _shared_stream is None or _shared_stream_pid != pid:
+                config = current_app.config
+                _shared_stream = BlockStream(
+                    current_app._get_current_object(),
+                    get_shared_web3_service(),
+                    build_update,
+                    poll_interval=config.get('STREAM_POLL_INTERVAL', 1),
+                    max_events=config.get('STREAM_QUEUE_SIZE', 16)
+                )
+                _shared_stream_pid = pid
+    return _shared_stream
+
+class Subscription:
+    """Bounded event queue for one connected client"""
+
+    def __init__(self, address=None, max_events=16):
+        self.address = address
+        self._events = queue.Queue(maxsize=max_events)
+
+    def put(self, event):
+        # A client that stops reading loses its oldest events rather than blocking the publisher
+        while True:
+            try:
+                self._events.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self._events.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """Next (event, block_number, data) tuple, or None after `timeout` seconds"""
+        try:
+            return self._events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+class BlockStream:
+    """
+    Single block subscriber per process that fans chain state out to connected clients.
+    A background thread watches the head block; on every new block it calls
+    `build_update(addresses)` once for all subscribed addresses and pushes only the
+    asset list and per-address positions that changed to each subscription.
+    """
+
+    def __init__(self, app, web3_service, build_update, poll_interval=1, max_events=16):
+        self.app = app
+        self.web3_service = web3_service
+        self.build_update = build_update
+        self.poll_interval = poll_interval
+        self.max_events = max_events
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._block_number = None
+        self._assets = None
+        self._positions = {}
+        self._pending_addresses = set()
+
+    def subscribe(self, address=None):
+        """Register a client; it immediately receives the latest known state"""
+        subscription = Subscription(address, self.max_events)
+        with self._lock:
+            self._subscriptions.add(subscription)
+            if self._assets is not None:
+                subscription.put(('assets', self._block_number, self._assets))
+            if address is not None:
+                if address in self._positions:
+                    subscription.put(('positions', self._block_number, self._positions[address]))
+                else:
+                    self._pending_addresses.add(address)
+            self._ensure_running()
+        self._wakeup.set()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+            addresses = {s.address for s in self._subscriptions}
+            for address in list(self._positions):
+                if address not in addresses:
+                    del self._positions[address]
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscriptions)
+
+    def _ensure_running(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='block-stream', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        with self.app.app_context():
+            while True:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                try:
+                    self._poll()
+                except Exception as e:
+                    self.app.logger.error(f"Block stream update failed: {str(e)}")
+                finally:
+                    db.session.remove()
+
+    def _poll(self):
+        with self._lock:
+            if not self._subscriptions:
+                return
+            addresses = sorted({s.address for s in self._subscriptions if s.address is not None})
+            pending = bool(self._pending_addresses)
+            self._pending_addresses.clear()
+
+        block_number = self.web3_service.get_block_number(cached=True)
+        if block_number == self._block_number and not pending:
+            return
+
+        assets, positions = self.build_update(addresses)
+        self._publish(block_number, assets, positions)
+
+    def _publish(self, block_number, assets, positions):
+        assets = json.dumps(assets)
+        positions = {address: json.dumps(value) for address, value in positions.items()}
+
+        with self._lock:
+            self._block_number = block_number
+            events = []
+            if assets != self._assets:
+                self._assets = assets
+                events.append((None, ('assets', block_number, assets)))
+            for address, data in positions.items():
+                if data != self._positions.get(address):
+                    self._positions[address] = data
+                    events.append((address, ('positions', block_number, data)))
+
+            for subscription in self._subscriptions:
+                for address, event in events:
+                    if address is None or address == subscription.address:
+                        subscription.put(event)
@@ -0,0 +1,165 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+
+class LRUCacheBackend:
+    """In-process LRU store for cached contract call results"""
+
+    name = 'memory'
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class RedisCacheBackend:
+    """Redis store shared by all worker processes; values are JSON encoded"""
+
+    name = 'redis'
+
+    def __init__(self, redis_url, prefix='web3:call:'):
+        import redis
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.client.ping()
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, json.dumps(value), ex=max(1, int(round(ttl))))
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            self.client.delete(key)
+
+class CallCache:
+    """
+    Block-aware cache for contract view calls.
+    Entries are keyed by function name, arguments and block number, so they are
+    invalidated as soon as the chain advances and in any case after `ttl` seconds.
+    The last value of every call is also kept for `stale_ttl` seconds, to be served
+    while the provider is unreachable.
+    """
+
+    def __init__(self, backend, ttl=12, stale_ttl=0):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.stale_hits = 0
+        self._stats_lock = threading.Lock()
+
+    @staticmethod
+    def make_key(fn_name, args, block_number):
+        return f"{block_number}:{fn_name}:{json.dumps(list(args), default=str)}"
+
+    def get(self, fn_name, args, block_number):
+        """Return (hit, value) for a call at the given block"""
+        try:
+            value = self.backend.get(self.make_key(fn_name, args, block_number))
+        except Exception as e:
+            current_app.logger.warning(f"Call cache read failed: {str(e)}")
+            self._count('errors')
+            return False, None
+
+        if value is None:
+            self._count('misses')
+            return False, None
+        self._count('hits')
+        return True, value
+
+    def set(self, fn_name, args, block_number, value):
+        try:
+            self.backend.set(self.make_key(fn_name, args, block_number), value, self.ttl)
+            if self.stale_ttl:
+                self.backend.set(self.make_key(fn_name, args, 'stale'), value, self.stale_ttl)
+        except Exception as e:
+            current_app.logger.warning(f"Call cache write failed: {str(e)}")
+            self._count('errors')
+
+    def get_stale(self, fn_name, args):
+        """Return (hit, value) for the last stored result of a call, whatever its block"""
+        if not self.stale_ttl:
+            return False, None
+        try:
+            value = self.backend.get(self.make_key(fn_name, args, 'stale'))
+        except Exception as e:
+            current_app.logger.warning(f"Call cache read failed: {str(e)}")
+            self._count('errors')
+            return False, None
+        if value is None:
+            return False, None
+        self._count('stale_hits')
+        return True, value
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        """Hit/miss counters for this process"""
+        lookups = self.hits + self.misses
+        return {
+            'backend': self.backend.name,
+            'hits': self.hits,
+            'misses': self.misses,
+            'errors': self.errors,
+            'staleHits': self.stale_hits,
+            'hitRate': self.hits / lookups if lookups else 0.0,
+            'ttl': self.ttl
+        }
+
+    def _count(self, counter):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+def create_cache_backend(backend_name, config, prefix, max_entries=1024):
+    """Build a Redis or in-process backend, or None when `backend_name` is 'none'"""
+    backend_name = (backend_name or 'memory').lower()
+    if backend_name == 'none':
+        return None
+
+    if backend_name == 'redis':
+        try:
+            return RedisCacheBackend(config['REDIS_URL'], prefix=prefix)
+        except Exception as e:
+            current_app.logger.warning(f"Redis cache unavailable, using in-process cache: {str(e)}")
+    return LRUCacheBackend(max_entries=max_entries)
+
+def create_call_cache(config):
+    """Build the call cache described by the app config, or None when caching is disabled"""
+    backend = create_cache_backend(
+        config.get('WEB3_CACHE_BACKEND'), config, 'web3:call:',
+        max_entries=config.get('WEB3_CACHE_MAX_ENTRIES', 1024)
+    )
+    if backend is None:
+        return None
+    return CallCache(backend, ttl=config.get('WEB3_CACHE_TTL', 12), stale_ttl=config.get('WEB3_CACHE_STALE_TTL', 300))
@@ -0,0 +1,322 @@
+import time
+from datetime import datetime
+from decimal import Decimal
+from eth_utils import event_abi_to_log_topic
+from flask import current_app
+from app import db
+from app.models.models import User, Asset, Position, Transaction, IndexerCheckpoint
+from app.services.ingestion import insert_transactions, upsert_users
+from app.services.asset_registry import refresh_asset_registry
+
+# Events that become Transaction rows, mapped to their tx_type
+POSITION_EVENTS = {
+    'Deposit': 'deposit',
+    'Withdraw': 'withdraw',
+    'Borrow': 'borrow',
+    'Repay': 'repay',
+    'Liquidated': 'liquidated',
+}
+ASSET_EVENTS = ('InterestRateUpdated', 'AssetAdded', 'AssetUpdated')
+
+def to_token_units(raw_amount, decimals):
+    """Convert an on-chain integer amount to the token-unit Decimal stored in Numeric(36, 18) columns"""
+    return Decimal(int(raw_amount)).scaleb(-(18 if decimals is None else decimals))
+
+def to_raw_amount(amount, decimals):
+    """Convert a token-unit Numeric column value back to the contract's integer amount"""
+    if amount is None:
+        return 0
+    return int(Decimal(amount).scaleb(18 if decimals is None else decimals))
+
+class EventIndexer:
+    """
+    Syncs DynamicLendingPool events into the SQL database.
+    Logs are pulled with eth_getLogs in block-range chunks, each chunk is written in a
+    single DB transaction together with the checkpoint, and positions touched by a chunk
+    are refreshed from contract storage in one batched call.
+    """
+
+    CHECKPOINT_NAME = 'DynamicLendingPool'
+
+    def __init__(self, web3_service, start_block=0, chunk_size=2000, confirmations=2, reorg_depth=12):
+        self.web3_service = web3_service
+        self.start_block = start_block
+        self.chunk_size = chunk_size
+        self.confirmations = confirmations
+        self.reorg_depth = reorg_depth
+        self._event_topics = None
+
+    @classmethod
+    def from_config(cls, web3_service, config):
+        return cls(
+            web3_service,
+            start_block=config.get('INDEXER_START_BLOCK', 0),
+            chunk_size=config.get('INDEXER_CHUNK_SIZE', 2000),
+            confirmations=config.get('INDEXER_CONFIRMATIONS', 2),
+            reorg_depth=config.get('INDEXER_REORG_DEPTH', 12)
+        )
+
+    def sync(self, max_chunks=None):
+        """Index all confirmed blocks after the checkpoint; returns the number of events written"""
+        checkpoint = self._get_checkpoint()
+        self._handle_reorg(checkpoint)
+
+        head = self.web3_service.get_block_number() - self.confirmations
+        indexed = 0
+        chunks = 0
+
+        while checkpoint.block_number < head and (max_chunks is None or chunks < max_chunks):
+            from_block = checkpoint.block_number + 1
+            to_block = min(from_block + self.chunk_size - 1, head)
+            indexed += self._index_range(checkpoint, from_block, to_block)
+            chunks += 1
+
+        return indexed
+
+    def run_forever(self, poll_interval=5):
+        """Keep the database in sync with the chain until interrupted"""
+        while True:
+            try:
+                indexed = self.sync()
+                if indexed:
+                    current_app.logger.info(f"Indexed {indexed} events")
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.error(f"Event indexer sync failed: {str(e)}")
+            time.sleep(poll_interval)
+
+    def _get_checkpoint(self):
+        checkpoint = db.session.get(IndexerCheckpoint, self.CHECKPOINT_NAME)
+        if checkpoint is None:
+            checkpoint = IndexerCheckpoint(name=self.CHECKPOINT_NAME, block_number=self.start_block - 1)
+            db.session.add(checkpoint)
+            db.session.commit()
+        return checkpoint
+
+    def _handle_reorg(self, checkpoint):
+        """
+        Rewind the checkpoint and drop indexed rows if the checkpoint block is no longer canonical.
+        Positions of affected users and every asset's parameters are re-read from the chain as
+        of the fork block, since orphaned asset events may have changed them.
+        """
+        if not checkpoint.block_hash or checkpoint.block_number < self.start_block:
+            return
+
+        header = self.web3_service.get_block_headers([checkpoint.block_number])[checkpoint.block_number]
+        if header['hash'] == checkpoint.block_hash:
+            return
+
+        fork_block = max(self.start_block - 1, checkpoint.block_number - self.reorg_depth)
+        current_app.logger.warning(
+            f"Reorg detected at block {checkpoint.block_number}, rewinding indexer to block {fork_block}"
+        )
+
+        # Positions of every user with orphaned transactions are refreshed from the chain
+        orphaned = db.session.query(User.address, Asset.symbol).join(
+            Transaction, Transaction.user_id == User.id
+        ).join(
+            Asset, Transaction.asset_id == Asset.id
+        ).filter(Transaction.block_number > fork_block).distinct().all()
+
+        try:
+            Transaction.query.filter(Transaction.block_number > fork_block).delete(synchronize_session=False)
+            self._refresh_positions(set(orphaned), max(fork_block, 0))
+            self._reload_asset_parameters(max(fork_block, 0))
+
+            checkpoint.block_number = fork_block
+            checkpoint.block_hash = None
+            if fork_block >= self.start_block:
+                checkpoint.block_hash = self.web3_service.get_block_headers([fork_block])[fork_block]['hash']
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        refresh_asset_registry()
+
+    def _index_range(self, checkpoint, from_block, to_block):
+        """Index one chunk of blocks and advance the checkpoint in the same DB transaction"""
+        logs = self.web3_service.get_contract_logs(from_block, to_block, topics=[list(self._topics())])
+        events = self.decode_logs(logs)
+
+        # Block timestamps for the events plus the hash of the chunk's last block, in one batch
+        block_numbers = {event['blockNumber'] for event in events} | {to_block}
+        headers = self.web3_service.get_block_headers(sorted(block_numbers))
+
+        try:
+            assets = {asset.symbol: asset for asset in Asset.query.all()}
+            touched = self._write_transactions(events, assets, headers)
+            self._apply_asset_events(events, assets)
+            self._refresh_positions(touched, to_block)
+
+            checkpoint.block_number = to_block
+            checkpoint.block_hash = headers[to_block]['hash']
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        if any(event['event'] in ASSET_EVENTS for event in events):
+            refresh_asset_registry()
+        return len(events)
+
+    def _topics(self):
+        """Map of topic0 -> event name for the events this indexer handles"""
+        if self._event_topics is None:
+            contract = self.web3_service.contract
+            names = set(POSITION_EVENTS) | set(ASSET_EVENTS)
+            self._event_topics = {
+                '0x' + event_abi_to_log_topic(abi).hex(): abi['name']
+                for abi in contract.abi
+                if abi.get('type') == 'event' and abi['name'] in names
+            }
+        return self._event_topics
+
+    def decode_logs(self, logs):
+        """Decode the pool events this indexer handles, skipping logs of other contracts or events"""
+        pool_address = self.web3_service.contract.address.lower()
+        events = []
+        for log in logs:
+            if not log['topics'] or log['address'].lower() != pool_address:
+                continue
+            event = self._decode_log(log)
+            if event is not None:
+                events.append(event)
+        return events
+
+    def _decode_log(self, log):
+        topic = log['topics'][0]
+        topic = topic.hex() if isinstance(topic, bytes) else topic
+        topic = topic if topic.startswith('0x') else '0x' + topic
+        name = self._topics().get(topic)
+        if name is None:
+            return None
+
+        event = getattr(self.web3_service.contract.events, name)().process_log(log)
+        return {
+            'event': name,
+            'args': dict(event['args']),
+            'blockNumber': event['blockNumber'],
+            'logIndex': event['logIndex'],
+            'txHash': event['transactionHash'].hex() if isinstance(event['transactionHash'], bytes) else event['transactionHash']
+        }
+
+    def _write_transactions(self, events, assets, headers):
+        """Bulk insert position events as Transaction rows; returns the touched (address, symbol) pairs"""
+        rows, touched = self.transaction_rows(events, assets, headers)
+
+        # Transactions already recorded through the API or a previous run are skipped
+        insert_transactions(rows)
+        return touched
+
+    def transaction_rows(self, events, assets, headers):
+        """
+        Transaction mappings (keyed by address) for the position events among `events`, and
+        the (address, symbol) pairs they touch. `assets` maps symbol to an object with id and
+        decimals; `headers` maps block number to its header.
+        """
+        position_events = [
+            event for event in events
+            if event['event'] in POSITION_EVENTS and event['args']['symbol'] in assets
+        ]
+
+        rows = []
+        touched = set()
+        for event in position_events:
+            args = event['args']
+            address = args['user'].lower()
+            touched.add((address, args['symbol']))
+            rows.append({
+                'address': address,
+                'asset_id': assets[args['symbol']].id,
+                'tx_type': POSITION_EVENTS[event['event']],
+                'amount': to_token_units(args['amount'], assets[args['symbol']].decimals),
+                'interest_amount': to_token_units(args.get('interest', 0), assets[args['symbol']].decimals),
+                'tx_hash': event['txHash'],
+                'block_number': event['blockNumber'],
+                'timestamp': datetime.utcfromtimestamp(headers[event['blockNumber']]['timestamp'])
+            })
+        return rows, touched
+
+    def _apply_asset_events(self, events, assets):
+        """Apply asset parameter and interest rate changes in log order"""
+        for event in events:
+            if event['event'] not in ASSET_EVENTS:
+                continue
+
+            args = event['args']
+            asset = assets.get(args['symbol'])
+            if asset is None:
+                current_app.logger.warning(f"{event['event']} for unknown asset {args['symbol']}, skipping")
+                continue
+
+            if event['event'] == 'InterestRateUpdated':
+                asset.current_interest_rate = args['newRate']
+            else:
+                asset.base_interest_rate = args['baseInterestRate']
+                asset.collateral_factor = args['collateralFactor']
+                if event['event'] == 'AssetAdded':
+                    asset.current_interest_rate = args['baseInterestRate']
+
+    def _reload_asset_parameters(self, block_number):
+        """Overwrite every asset's interest rates and collateral factor with the contract's storage at `block_number`"""
+        assets = Asset.query.order_by(Asset.id).all()
+        configs = self.web3_service.get_asset_configs([asset.symbol for asset in assets], block_number)
+        if len(configs) != len(assets):
+            raise ConnectionError("Could not read asset parameters: Web3 service not initialized")
+
+        for asset, config in zip(assets, configs):
+            if isinstance(config, Exception):
+                raise ValueError(f"Could not read asset parameters of {asset.symbol}: {config}")
+            if int(config[0], 16) == 0:
+                # Not listed yet at the fork block; its AssetAdded event is re-indexed
+                continue
+            asset.base_interest_rate = config[3]
+            asset.collateral_factor = config[4]
+            asset.current_interest_rate = config[5]
+
+    def _refresh_positions(self, pairs, block_number):
+        """
+        Overwrite Position rows for (address, symbol) pairs with the contract's storage at
+        `block_number`. Raises if any position cannot be read, so the caller's transaction
+        (and checkpoint) is rolled back instead of advancing past stale rows.
+        """
+        if not pairs:
+            return
+
+        pairs = sorted(pairs)
+        states = self.web3_service.get_position_states(pairs, block_number)
+        if len(states) != len(pairs):
+            raise ConnectionError("Could not read positions: Web3 service not initialized")
+        failed = [(pair, state) for pair, state in zip(pairs, states) if isinstance(state, Exception)]
+        if failed:
+            (address, symbol), error = failed[0]
+            raise ValueError(f"Could not read {len(failed)} positions, first {address} - {symbol}: {error}")
+
+        users = upsert_users(address for address, _ in pairs)
+        assets = {asset.symbol: asset for asset in Asset.query.filter(
+            Asset.symbol.in_({symbol for _, symbol in pairs})
+        )}
+        positions = {
+            (position.user_id, position.asset_id): position
+            for position in Position.query.filter(Position.user_id.in_(set(users.values())))
+        }
+
+        for (address, symbol), state in zip(pairs, states):
+            if symbol not in assets:
+                current_app.logger.warning(f"Position {address} - {symbol} is for an unknown asset, skipping")
+                continue
+
+            deposited, borrowed, last_interest_update, _ = state
+            key = (users[address], assets[symbol].id)
+            position = positions.get(key)
+            if position is None:
+                position = Position(user_id=key[0], asset_id=key[1])
+                db.session.add(position)
+                positions[key] = position
+
+            decimals = assets[symbol].decimals
+            position.deposited_amount = to_token_units(deposited, decimals)
+            position.borrowed_amount = to_token_units(borrowed, decimals)
+            position.last_interest_update = (
+                datetime.utcfromtimestamp(last_interest_update) if last_interest_update else None
+            )
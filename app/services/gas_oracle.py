@@ -0,0 +1,122 @@
+import threading
+import time
+from statistics import median
+from flask import current_app
+
+class GasEstimateCache:
+    """
+    Gas limits per (contract function, asset), shared by all users.
+    The largest estimate seen is kept with a safety multiplier until `ttl` expires,
+    after which the next transaction preparation estimates again. Failed estimates are
+    only remembered for `failure_ttl`, so a revert for one user (e.g. a missing allowance)
+    does not pin a limit for everyone.
+    """
+
+    def __init__(self, ttl=300, multiplier=1.2, failure_ttl=15):
+        self.ttl = ttl
+        self.multiplier = multiplier
+        self.failure_ttl = failure_ttl
+        self._limits = {}
+        self._failures = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            ttl=config.get('GAS_ESTIMATE_TTL', 300),
+            multiplier=config.get('GAS_LIMIT_MULTIPLIER', 1.2),
+            failure_ttl=config.get('GAS_ESTIMATE_FAILURE_TTL', 15)
+        )
+
+    def get(self, fn_name, symbol):
+        """Cached gas limit, or None when the shape has not been estimated recently"""
+        with self._lock:
+            entry = self._limits.get((fn_name, symbol))
+            if entry is None or entry[0] < time.monotonic():
+                return None
+            return entry[1]
+
+    def recently_failed(self, fn_name, symbol):
+        """Whether estimating the shape failed within the last `failure_ttl` seconds"""
+        with self._lock:
+            return self._failures.get((fn_name, symbol), 0) >= time.monotonic()
+
+    def update(self, fn_name, symbol, estimate):
+        """Store a node estimate and return the gas limit to use; a failed estimate (None) returns None"""
+        with self._lock:
+            if not estimate:
+                self._failures[(fn_name, symbol)] = time.monotonic() + self.failure_ttl
+                return None
+            limit = int(estimate * self.multiplier)
+            entry = self._limits.get((fn_name, symbol))
+            if entry is not None and entry[0] >= time.monotonic():
+                limit = max(limit, entry[1])
+            self._limits[(fn_name, symbol)] = (time.monotonic() + self.ttl, limit)
+            self._failures.pop((fn_name, symbol), None)
+        return limit
+
+class FeeHistoryPoller:
+    """
+    Keeps EIP-1559 fee suggestions current with one eth_feeHistory call per poll interval,
+    shared by every transaction preparation in the process. Nodes without fee history
+    support fall back to a legacy gas price.
+    """
+
+    PERCENTILES = (25, 50, 75)
+
+    def __init__(self, web3_service, poll_interval=12, block_count=10):
+        self.web3_service = web3_service
+        self.poll_interval = poll_interval
+        self.block_count = block_count
+        self._fees = None
+        self._thread = None
+        self._app = None
+        self._lock = threading.Lock()
+
+    def suggestion(self):
+        """Latest fee suggestion; fetched inline only until the background poller has data"""
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._app = current_app._get_current_object()
+                    if self._fees is None:
+                        self._refresh()
+                    self._thread = threading.Thread(target=self._run, name='fee-history-poller', daemon=True)
+                    self._thread.start()
+        return self._fees
+
+    def _run(self):
+        with self._app.app_context():
+            while True:
+                time.sleep(self.poll_interval)
+                self._refresh()
+
+    def _refresh(self):
+        try:
+            history = self.web3_service.get_fee_history(self.block_count, list(self.PERCENTILES))
+            self._fees = self.suggest_fees(history)
+        except Exception as e:
+            current_app.logger.warning(f"eth_feeHistory failed, using legacy gas price: {str(e)}")
+            try:
+                self._fees = {'gasPrice': str(self.web3_service.get_gas_price())}
+            except Exception as e:
+                current_app.logger.error(f"Could not refresh fee suggestion: {str(e)}")
+
+    @classmethod
+    def suggest_fees(cls, history):
+        """
+        Slow/standard/fast EIP-1559 fees from a fee history result: the median priority fee
+        paid at each percentile over the window, on top of twice the next block's base fee
+        so the transaction stays valid through several full blocks.
+        """
+        base_fee = int(history['baseFeePerGas'][-1])
+        rewards = [block_rewards for block_rewards in history.get('reward') or [] if block_rewards]
+
+        suggestions = {}
+        for i, speed in enumerate(('slow', 'standard', 'fast')):
+            priority_fee = int(median(int(block_rewards[i]) for block_rewards in rewards)) if rewards else 0
+            suggestions[speed] = {
+                'maxPriorityFeePerGas': str(priority_fee),
+                'maxFeePerGas': str(2 * base_fee + priority_fee)
+            }
+        return {'baseFeePerGas': str(base_fee), **suggestions}
@@ -0,0 +1,61 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from app.models.models import User, Transaction
+
+# Rows per INSERT statement; large batches are split so statements stay under driver limits
+INSERT_CHUNK_SIZE = 500
+
+def insert_ignoring_conflicts(model, rows, conflict_columns):
+    """
+    Bulk insert mappings, silently skipping rows that hit a unique constraint on
+    `conflict_columns` (INSERT ... ON CONFLICT DO NOTHING). The caller commits.
+    """
+    if not rows:
+        return
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect not in ('postgresql', 'sqlite'):
+        # No portable ON CONFLICT: skip rows that already exist, then insert the rest
+        columns = [getattr(model, name) for name in conflict_columns]
+        keys = {tuple(row[name] for name in conflict_columns) for row in rows}
+        skip = {tuple(key) for key in db.session.query(*columns).filter(db.tuple_(*columns).in_(keys))}
+        new_rows = []
+        for row in rows:
+            key = tuple(row[name] for name in conflict_columns)
+            if key not in skip:
+                skip.add(key)
+                new_rows.append(row)
+        db.session.bulk_insert_mappings(model, new_rows)
+        return
+
+    insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+    statement = insert(model.__table__).on_conflict_do_nothing(index_elements=conflict_columns)
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        db.session.execute(statement, rows[start:start + INSERT_CHUNK_SIZE])
+
+def upsert_users(addresses):
+    """Insert missing users by address and return a map of address -> user id"""
+    addresses = set(addresses)
+    if not addresses:
+        return {}
+
+    users = dict(db.session.query(User.address, User.id).filter(User.address.in_(addresses)))
+    missing = addresses - users.keys()
+    if missing:
+        insert_ignoring_conflicts(User, [{'address': address} for address in sorted(missing)], ['address'])
+        users.update(db.session.query(User.address, User.id).filter(User.address.in_(missing)))
+    return users
+
+def insert_transactions(rows):
+    """
+    Insert Transaction mappings keyed by address instead of user_id, creating users as needed.
+    Transactions whose tx_hash is already stored are skipped, so replaying a batch is harmless.
+    """
+    if not rows:
+        return
+
+    users = upsert_users(row['address'] for row in rows)
+    insert_ignoring_conflicts(Transaction, [
+        {key: value for key, value in dict(row, user_id=users[row['address']]).items() if key != 'address'}
+        for row in rows
+    ], ['tx_hash'])
@@ -0,0 +1,208 @@
+import os
+import threading
+import numpy as np
+from datetime import datetime, timedelta, timezone
+from app import db
+from app.models.models import User, Position
+from app.services.asset_registry import get_asset_registry
+from app.services.event_indexer import to_raw_amount
+
+YEAR_IN_SECONDS = 31536000  # Matches DynamicLendingPool.YEAR_IN_SECONDS
+
+_shared_scanner = None
+_shared_scanner_pid = None
+_shared_scanner_lock = threading.Lock()
+
+# Rows whose float health factor lies this close to 1.0 are re-checked with exact integer math
+_EXACT_CHECK_BAND = 1e-9
+
+def scan_positions(deposited, borrowed, collateral_factor, interest_rate, elapsed, price, threshold=1.0):
+    """
+    Compute health factors for every position in one vectorized pass.
+    All inputs are equal-length arrays; amounts are in token units, collateral factor and
+    interest rate in basis points, elapsed in seconds since the last interest update, price in USD.
+    Returns (candidate_indices, health_factor, shortfall_usd, borrowed_with_interest); candidates are
+    positions with health factor below `threshold`, ranked by USD shortfall, largest first.
+    """
+    deposited = np.asarray(deposited, dtype=np.float64)
+    borrowed = np.asarray(borrowed, dtype=np.float64)
+    collateral_factor = np.asarray(collateral_factor, dtype=np.float64)
+
+    # Interest the contract adds in _updateInterest before checking health
+    accrued = borrowed * np.asarray(interest_rate, dtype=np.float64) * np.asarray(elapsed, dtype=np.float64)
+    borrowed = borrowed + accrued / (YEAR_IN_SECONDS * 10000)
+
+    max_borrow = deposited * collateral_factor / 10000
+    with np.errstate(divide='ignore', invalid='ignore'):
+        health_factor = np.where(borrowed > 0, max_borrow / borrowed, np.inf)
+    shortfall_usd = (borrowed - max_borrow) * np.asarray(price, dtype=np.float64)
+
+    candidates = np.flatnonzero(health_factor < threshold)
+    order = np.lexsort((health_factor[candidates], -shortfall_usd[candidates]))
+    return candidates[order], health_factor, shortfall_usd, borrowed
+
+def _epoch_seconds(column):
+    """SQL expression converting a naive UTC DateTime column to unix seconds, avoiding per-row parsing"""
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        return db.func.extract('epoch', column)
+    if dialect == 'sqlite':
+        return db.cast(db.func.strftime('%s', column), db.Float)
+    return db.func.unix_timestamp(column)
+
+def get_shared_liquidation_scanner():
+    """The process-wide LiquidationScanner, so every scan after the first only loads changed rows"""
+    global _shared_scanner, _shared_scanner_pid
+
+    pid = os.getpid()
+    if _shared_scanner is None or _shared_scanner_pid != pid:
+        with _shared_scanner_lock:
+            if _shared_scanner is None or _shared_scanner_pid != pid:
+                _shared_scanner = LiquidationScanner()
+                _shared_scanner_pid = pid
+    return _shared_scanner
+
+class LiquidationScanner:
+    """
+    Finds positions at or near the liquidation threshold across all users and assets.
+    Position amounts are kept in NumPy arrays between scans; each scan only reloads rows
+    updated since the previous one, so a long-lived scanner can run every block.
+    """
+
+    def __init__(self, threshold=1.05):
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._ids = np.empty(0, dtype=np.int64)
+        self._asset_ids = np.empty(0, dtype=np.int64)
+        self._deposited = np.empty(0, dtype=np.float64)
+        self._borrowed = np.empty(0, dtype=np.float64)
+        self._last_update = np.empty(0, dtype=np.float64)
+        self._row_index = {}
+        self._synced_at = None
+
+    def scan(self, prices=None, now=None, threshold=None):
+        """
+        Scan every open borrow position.
+        `prices` maps symbol to USD price and is only used to rank candidates by shortfall;
+        `threshold` overrides the scanner's default for this scan.
+        """
+        with self._lock:
+            return self._scan(prices, now, self.threshold if threshold is None else threshold)
+
+    def _scan(self, prices, now, threshold):
+        self._sync_positions()
+
+        assets = {asset.id: asset for asset in get_asset_registry().active}
+        if not assets or len(self._ids) == 0:
+            return []
+        prices = prices or {}
+        now = (now or datetime.now(timezone.utc)).replace(tzinfo=timezone.utc).timestamp()
+
+        # Per-asset parameters, broadcast to positions through an index array
+        asset_ids = np.array(sorted(assets), dtype=np.int64)
+        asset_cf = np.array([assets[a].collateral_factor for a in asset_ids], dtype=np.float64)
+        asset_rate = np.array([self._interest_rate(assets[a]) for a in asset_ids], dtype=np.float64)
+        asset_price = np.array([prices.get(assets[a].symbol, 0.0) for a in asset_ids], dtype=np.float64)
+
+        idx = np.minimum(np.searchsorted(asset_ids, self._asset_ids), len(asset_ids) - 1)
+        rows = np.flatnonzero((asset_ids[idx] == self._asset_ids) & (self._borrowed > 0))
+        idx = idx[rows]
+
+        elapsed = np.nan_to_num(np.maximum(now - self._last_update[rows], 0), nan=0.0)
+        candidates, health_factor, shortfall_usd, borrowed_now = scan_positions(
+            self._deposited[rows], self._borrowed[rows], asset_cf[idx], asset_rate[idx],
+            elapsed, asset_price[idx], threshold=threshold
+        )
+        if len(candidates) == 0:
+            return []
+
+        # Addresses and exact amounts are only loaded for the candidates
+        candidate_ids = self._ids[rows[candidates]].tolist()
+        details = {
+            row[0]: row[1:] for row in db.session.query(
+                Position.id, User.address, Position.deposited_amount,
+                Position.borrowed_amount, Position.last_interest_update
+            ).join(User, Position.user_id == User.id).filter(Position.id.in_(candidate_ids))
+        }
+
+        result = []
+        for i, position_id in zip(candidates, candidate_ids):
+            address, deposited, borrowed, last_interest_update = details[position_id]
+            asset = assets[int(self._asset_ids[rows[i]])]
+            liquidatable = health_factor[i] < 1.0
+            if abs(health_factor[i] - 1.0) < _EXACT_CHECK_BAND:
+                liquidatable = not self._is_healthy_exact(
+                    asset, deposited, borrowed, last_interest_update, int(elapsed[i])
+                )
+            result.append({
+                'position_id': position_id,
+                'user_address': address,
+                'asset': asset.symbol,
+                'deposited': float(self._deposited[rows[i]]),
+                'borrowed': float(borrowed_now[i]),
+                'health_factor': float(health_factor[i]),
+                'shortfall_usd': float(shortfall_usd[i]),
+                'liquidatable': bool(liquidatable)
+            })
+        return result
+
+    def _sync_positions(self):
+        """Load all open borrows on the first call, then only positions updated since the last sync"""
+        positions = Position.__table__
+        query = db.select(
+            positions.c.id,
+            positions.c.asset_id,
+            db.cast(positions.c.deposited_amount, db.Float),
+            db.cast(positions.c.borrowed_amount, db.Float),
+            _epoch_seconds(positions.c.last_interest_update)
+        )
+        if self._synced_at is None:
+            query = query.where(positions.c.borrowed_amount > 0)
+        else:
+            query = query.where(positions.c.updated_at >= self._synced_at)
+
+        # Small overlap so rows committed while this query runs are picked up next time
+        started_at = datetime.utcnow() - timedelta(seconds=1)
+        rows = db.session.connection().execute(query).all()
+        self._synced_at = started_at
+        if not rows:
+            return
+
+        ids, asset_ids, deposited, borrowed, last_update = zip(*rows)
+        ids = np.array(ids, dtype=np.int64)
+        asset_ids = np.array(asset_ids, dtype=np.int64)
+        deposited = np.array(deposited, dtype=np.float64)
+        borrowed = np.array(borrowed, dtype=np.float64)
+        last_update = np.array(last_update, dtype=np.float64)  # None becomes NaN: no accrued interest
+
+        existing = np.fromiter((self._row_index.get(i, -1) for i in ids.tolist()), dtype=np.int64, count=len(ids))
+        updated = existing >= 0
+        if updated.any():
+            at = existing[updated]
+            self._asset_ids[at] = asset_ids[updated]
+            self._deposited[at] = deposited[updated]
+            self._borrowed[at] = borrowed[updated]
+            self._last_update[at] = last_update[updated]
+
+        added = ~updated
+        if added.any():
+            offset = len(self._ids)
+            self._row_index.update((i, offset + n) for n, i in enumerate(ids[added].tolist()))
+            self._ids = np.concatenate([self._ids, ids[added]])
+            self._asset_ids = np.concatenate([self._asset_ids, asset_ids[added]])
+            self._deposited = np.concatenate([self._deposited, deposited[added]])
+            self._borrowed = np.concatenate([self._borrowed, borrowed[added]])
+            self._last_update = np.concatenate([self._last_update, last_update[added]])
+
+    @staticmethod
+    def _interest_rate(asset):
+        return asset.current_interest_rate if asset.current_interest_rate is not None else asset.base_interest_rate
+
+    def _is_healthy_exact(self, asset, deposited, borrowed, last_interest_update, elapsed):
+        """Integer replica of _updateInterest followed by _isHealthyPosition"""
+        decimals = 18 if asset.decimals is None else asset.decimals
+        deposited = to_raw_amount(deposited, decimals)
+        borrowed = to_raw_amount(borrowed, decimals)
+        if last_interest_update and borrowed:
+            borrowed += (borrowed * self._interest_rate(asset) * max(elapsed, 0)) // (YEAR_IN_SECONDS * 10000)
+        return borrowed <= (deposited * asset.collateral_factor) // 10000
@@ -0,0 +1,148 @@
+import random
+import threading
+import time
+from web3.providers.base import JSONBaseProvider
+from app.services.rpc_policy import CircuitBreaker, CircuitOpenError, TRANSIENT_RPC_CODES, is_transient_error
+
+# Lookups a lagging node answers with null; another node may already know the transaction
+FAILOVER_ON_EMPTY = {'eth_getTransactionReceipt', 'eth_getTransactionByHash'}
+
+class RpcEndpoint:
+    """One node URL with its circuit breaker and smoothed latency and error rate"""
+
+    def __init__(self, uri, breaker, smoothing=0.2):
+        self.uri = uri
+        self.breaker = breaker
+        self.smoothing = smoothing
+        self.latency = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def score(self):
+        """Lower is better; endpoints without measurements are tried first"""
+        if self.latency is None:
+            return 0.0
+        return self.latency * (1 + 4 * self.error_rate)
+
+    def record_success(self, elapsed):
+        self.breaker.record_success()
+        with self._lock:
+            self.requests += 1
+            self.latency = elapsed if self.latency is None else self.latency + self.smoothing * (elapsed - self.latency)
+            self.error_rate -= self.smoothing * self.error_rate
+
+    def record_failure(self):
+        self.breaker.record_failure()
+        with self._lock:
+            self.requests += 1
+            self.failures += 1
+            self.error_rate += self.smoothing * (1 - self.error_rate)
+
+    def status(self):
+        status = self.breaker.status()
+        with self._lock:
+            status.update({
+                'uri': self.uri,
+                'latencyMs': round(self.latency * 1000, 1) if self.latency is not None else None,
+                'errorRate': round(self.error_rate, 3),
+                'requests': self.requests,
+                'failures': self.failures
+            })
+        return status
+
+class ProviderPool(JSONBaseProvider):
+    """
+    web3 provider spreading JSON-RPC requests over several nodes.
+    Each request goes to the healthy endpoint with the lowest smoothed latency; transient
+    failures, overload errors and (for receipt lookups) empty answers fail over to the next
+    endpoint. A small share of requests is sent to a random healthy endpoint so latency
+    figures of idle nodes stay current.
+    """
+
+    def __init__(self, uris, session, request_timeout=10, failure_threshold=5, reset_timeout=30, explore_ratio=0.05):
+        super().__init__()
+        if not uris:
+            raise ValueError("At least one provider URI is required")
+        self.session = session
+        self.request_timeout = request_timeout
+        self.explore_ratio = explore_ratio
+        self.endpoints = [
+            RpcEndpoint(uri, CircuitBreaker(failure_threshold=failure_threshold, reset_timeout=reset_timeout))
+            for uri in uris
+        ]
+
+    def make_request(self, method, params):
+        request_data = self.encode_rpc_request(method, params)
+
+        def send(endpoint):
+            return self.decode_rpc_response(self._post(endpoint, request_data))
+
+        def is_empty(response):
+            return method in FAILOVER_ON_EMPTY and response.get('result') is None
+
+        return self._route(send, is_empty)
+
+    def make_batch_request(self, payload):
+        """Send a JSON-RPC batch payload (a list of request dicts) and return the decoded reply"""
+        return self._route(lambda endpoint: self._post(endpoint, payload, encoded=False))
+
+    def status(self):
+        return [endpoint.status() for endpoint in self.endpoints]
+
+    def _post(self, endpoint, data, encoded=True):
+        kwargs = {'data': data, 'headers': {'Content-Type': 'application/json'}} if encoded else {'json': data}
+        response = self.session.post(endpoint.uri, timeout=self.request_timeout, **kwargs)
+        response.raise_for_status()
+        return response.content if encoded else response.json()
+
+    def _ranked(self):
+        """Endpoints ordered by health then latency, occasionally exploring another healthy one"""
+        ranked = sorted(
+            self.endpoints,
+            key=lambda endpoint: (endpoint.breaker.state != CircuitBreaker.CLOSED, endpoint.score())
+        )
+        healthy = [endpoint for endpoint in ranked if endpoint.breaker.state == CircuitBreaker.CLOSED]
+        if len(healthy) > 1 and random.random() < self.explore_ratio:
+            probe = random.choice(healthy[1:])
+            ranked.remove(probe)
+            ranked.insert(0, probe)
+        return ranked
+
+    def _route(self, send, is_empty=None):
+        last_error = None
+        last_response = None
+
+        for endpoint in self._ranked():
+            if not endpoint.breaker.allow():
+                continue
+
+            started_at = time.monotonic()
+            try:
+                response = send(endpoint)
+            except Exception as e:
+                if not is_transient_error(e):
+                    endpoint.record_success(time.monotonic() - started_at)
+                    raise
+                endpoint.record_failure()
+                last_error = e
+                continue
+
+            error = response.get('error') if isinstance(response, dict) else None
+            if isinstance(error, dict) and error.get('code') in TRANSIENT_RPC_CODES:
+                endpoint.record_failure()
+                last_response = response
+                continue
+
+            endpoint.record_success(time.monotonic() - started_at)
+            if is_empty is not None and is_empty(response):
+                last_response = response
+                continue
+            return response
+
+        if last_response is not None:
+            return last_response
+        if last_error is not None:
+            raise last_error
+        raise CircuitOpenError("Circuit breakers of all providers are open")
@@ -0,0 +1,175 @@
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from app import db
+from app.models.models import PendingTransaction
+from app.services.asset_registry import get_asset_registry
+from app.services.event_indexer import EventIndexer, POSITION_EVENTS
+from app.services.ingestion import insert_ignoring_conflicts, insert_transactions
+
+# Statuses the confirmer still has to look at
+OPEN_STATUSES = ('pending', 'mined')
+
+# Entries that may be queued again by recording the same hash
+RETRY_STATUSES = ('failed', 'dropped')
+
+def enqueue_transactions(records):
+    """
+    Queue submitted transactions for confirmation in one statement and one commit.
+    `records` are dicts with tx_hash, tx_type, address, symbol and amount; hashes that are
+    already queued keep their existing entry, unless it failed or was dropped, in which case
+    it is queued again with the new record. Returns the PendingTransaction of every record,
+    in order.
+    """
+    insert_ignoring_conflicts(PendingTransaction, [
+        dict(record, status='pending') for record in records
+    ], ['tx_hash'])
+
+    tx_hashes = [record['tx_hash'] for record in records]
+    pending = {
+        row.tx_hash: row for row in
+        PendingTransaction.query.filter(PendingTransaction.tx_hash.in_(tx_hashes))
+    }
+    now = datetime.utcnow()
+    requeued = {
+        record['tx_hash']: dict(
+            record, id=pending[record['tx_hash']].id, status='pending', block_number=None, error=None,
+            created_at=now, updated_at=now
+        )
+        for record in records if pending[record['tx_hash']].status in RETRY_STATUSES
+    }
+    if requeued:
+        db.session.bulk_update_mappings(PendingTransaction, list(requeued.values()))
+    db.session.commit()
+    return [pending[tx_hash] for tx_hash in tx_hashes]
+
+class ReceiptConfirmer:
+    """
+    Confirms queued transactions; run by confirm_transactions.py in exactly one process.
+    Each tick fetches the head block and the receipts of a batch of open entries in one
+    batched RPC, marks entries mined, failed or dropped, and writes a Transaction row for
+    every entry `confirmations` blocks deep, timestamped from its block header (one more
+    batched RPC when anything confirmed). All writes of a tick share one commit.
+    Recorded rows are built from the pool event in the receipt, never from the submitted
+    record, so they match what the event indexer writes for the same hash.
+    """
+
+    def __init__(self, web3_service, confirmations=2, batch_size=100, pending_timeout=3600):
+        self.web3_service = web3_service
+        self.confirmations = confirmations
+        self.batch_size = batch_size
+        self.pending_timeout = pending_timeout
+        self._after_id = 0
+        self._events = EventIndexer(web3_service)
+
+    @classmethod
+    def from_config(cls, web3_service, config):
+        return cls(
+            web3_service,
+            confirmations=config.get('RECEIPT_CONFIRMATIONS', 2),
+            batch_size=config.get('RECEIPT_BATCH_SIZE', 100),
+            pending_timeout=config.get('RECEIPT_PENDING_TIMEOUT', 3600)
+        )
+
+    def run_forever(self, poll_interval=2):
+        """Process the queue until interrupted"""
+        while True:
+            try:
+                if self.tick():
+                    continue
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.error(f"Receipt confirmation failed: {str(e)}")
+            finally:
+                db.session.remove()
+            time.sleep(poll_interval)
+
+    def tick(self):
+        """
+        Process one batch of open entries; returns True if a full batch was read,
+        meaning more entries are probably waiting.
+        """
+        # Walk the queue round-robin so long-pending entries cannot starve newer ones
+        rows = self._open_entries(self._after_id)
+        if not rows and self._after_id:
+            rows = self._open_entries(0)
+        if not rows:
+            self._after_id = 0
+            return False
+        full_batch = len(rows) == self.batch_size
+        self._after_id = rows[-1].id if full_batch else 0
+
+        head, receipts = self.web3_service.get_transaction_receipts([row.tx_hash for row in rows])
+        now = datetime.utcnow()
+        deadline = now - timedelta(seconds=self.pending_timeout)
+
+        updates = []
+        confirmed = []
+        for row in rows:
+            receipt = receipts.get(row.tx_hash)
+            update = {'id': row.id, 'updated_at': now}
+            if receipt is None:
+                if row.created_at is not None and row.created_at < deadline:
+                    update.update(status='dropped', error='No receipt before the pending timeout')
+                elif row.status == 'mined':
+                    # The block holding it was reorged out; wait for it to be mined again
+                    update.update(status='pending', block_number=None)
+                else:
+                    continue
+            elif receipt['status'] != 1:
+                update.update(status='failed', block_number=receipt['blockNumber'], error='Transaction reverted')
+            elif head - receipt['blockNumber'] + 1 >= self.confirmations:
+                update.update(status='confirmed', block_number=receipt['blockNumber'])
+                confirmed.append((row, receipt, update))
+            elif row.status != 'mined' or row.block_number != receipt['blockNumber']:
+                update.update(status='mined', block_number=receipt['blockNumber'])
+            else:
+                continue
+            updates.append(update)
+
+        try:
+            self._write_transactions(confirmed)
+            if updates:
+                db.session.bulk_update_mappings(PendingTransaction, updates)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return full_batch
+
+    def _open_entries(self, after_id):
+        return PendingTransaction.query.filter(
+            PendingTransaction.status.in_(OPEN_STATUSES),
+            PendingTransaction.id > after_id
+        ).order_by(PendingTransaction.id).limit(self.batch_size).all()
+
+    def _write_transactions(self, confirmed):
+        """
+        Bulk insert Transaction rows for confirmed entries; ones the event indexer already stored
+        are skipped. An entry whose receipt has no pool event of the submitted type, asset and
+        user is marked failed instead.
+        """
+        if not confirmed:
+            return
+
+        registry = get_asset_registry()
+        headers = self.web3_service.get_block_headers(sorted({receipt['blockNumber'] for _, receipt, _ in confirmed}))
+
+        rows = []
+        for row, receipt, update in confirmed:
+            asset = registry.get(row.symbol, active_only=False)
+            if asset is None:
+                update.update(status='failed', error='Asset not found')
+                continue
+            events = [
+                event for event in self._events.decode_logs(receipt['logs'])
+                if POSITION_EVENTS.get(event['event']) == row.tx_type
+                and event['args']['symbol'] == row.symbol
+                and event['args']['user'].lower() == row.address
+            ]
+            if not events:
+                update.update(status='failed', error=f"No {row.tx_type} event for this asset and address in the receipt")
+                continue
+            event_rows, _ = self._events.transaction_rows(events[:1], {row.symbol: asset}, headers)
+            rows.extend(event_rows)
+        insert_transactions(rows)
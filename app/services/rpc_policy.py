@@ -0,0 +1,133 @@
+import random
+import threading
+import time
+import requests
+from web3.exceptions import ContractLogicError, BadFunctionCallOutput, TimeExhausted
+
+# JSON-RPC error codes nodes use for overload and rate limiting rather than bad requests
+TRANSIENT_RPC_CODES = {-32005, 429}
+
+class CircuitOpenError(ConnectionError):
+    """Raised without contacting the provider while its circuit breaker is open"""
+
+def is_transient_error(error):
+    """
+    True for failures worth retrying or failing over: connection problems, timeouts,
+    HTTP 429/5xx and node overload errors. Reverts, bad arguments and decoding errors
+    are permanent and are raised immediately.
+    """
+    if isinstance(error, CircuitOpenError):
+        return True
+    if isinstance(error, (ContractLogicError, BadFunctionCallOutput)):
+        return False
+    if isinstance(error, (requests.ConnectionError, requests.Timeout, ConnectionError, TimeoutError, TimeExhausted)):
+        return True
+    if isinstance(error, requests.HTTPError):
+        status = error.response.status_code if error.response is not None else None
+        return status is None or status == 429 or status >= 500
+    if isinstance(error, ValueError) and error.args and isinstance(error.args[0], dict):
+        return error.args[0].get('code') in TRANSIENT_RPC_CODES
+    return False
+
+class CircuitBreaker:
+    """
+    Per-provider breaker: opens after `failure_threshold` consecutive transient failures,
+    rejects calls for `reset_timeout` seconds, then lets a single trial call through.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may be attempted now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def status(self):
+        with self._lock:
+            return {'state': self.state, 'consecutiveFailures': self.failures}
+
+class RetryPolicy:
+    """
+    Retries transient failures with full-jitter exponential backoff, never past `deadline`
+    seconds from the first attempt. Permanent errors are raised on the first attempt.
+    """
+
+    def __init__(self, max_attempts=3, base_delay=0.1, max_delay=1.0, deadline=3.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            max_attempts=config.get('WEB3_RETRY_ATTEMPTS', 3),
+            base_delay=config.get('WEB3_RETRY_BASE_DELAY', 0.1),
+            max_delay=config.get('WEB3_RETRY_MAX_DELAY', 1.0),
+            deadline=config.get('WEB3_RETRY_DEADLINE', 3.0)
+        )
+
+    def call(self, fn, breaker=None):
+        """Run `fn()` under this policy, recording the outcome on `breaker`"""
+        started_at = time.monotonic()
+        attempt = 0
+        while True:
+            if breaker is not None and not breaker.allow():
+                raise CircuitOpenError("Provider circuit breaker is open")
+
+            try:
+                result = fn()
+            except CircuitOpenError:
+                raise
+            except Exception as e:
+                if not is_transient_error(e):
+                    # The provider answered; the request itself was bad
+                    if breaker is not None:
+                        breaker.record_success()
+                    raise
+                if breaker is not None:
+                    breaker.record_failure()
+
+                attempt += 1
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                if attempt >= self.max_attempts or time.monotonic() - started_at + delay > self.deadline:
+                    raise
+                time.sleep(delay)
+                continue
+
+            if breaker is not None:
+                breaker.record_success()
+            return result
@@ -0,0 +1,207 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from flask import current_app
+from app import db
+from app.models.models import Asset, MetricRollup, VolatilityRecord, PriceRecord
+from app.services.asset_registry import get_asset_registry
+
+METRICS = ('volatility', 'rate', 'utilization', 'price')
+
+# Bucket width of each stored resolution
+RESOLUTIONS = {
+    '1h': timedelta(hours=1),
+    '1d': timedelta(days=1),
+}
+
+def bucket_start(timestamp, resolution):
+    """Start of the UTC bucket `timestamp` falls into"""
+    if resolution == '1h':
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+class TimeSeriesService:
+    """
+    Hourly and daily rollups of per-asset metrics.
+    Every sample is folded into its hour and day buckets when it is written, so chart
+    queries read at most one row per bucket and metric instead of scanning raw records.
+    """
+
+    def __init__(self, web3_service=None):
+        self.web3_service = web3_service
+
+    def record(self, samples, skip_existing=False):
+        """
+        Fold (asset_id, metric, timestamp, value) samples into their rollup buckets.
+        Buckets are read and written in bulk; the caller commits. With `skip_existing`,
+        buckets that already have data are left untouched (used by backfills).
+        Returns the number of buckets written.
+        """
+        buckets = {}
+        for asset_id, metric, timestamp, value in samples:
+            if value is None:
+                continue
+            value = float(value)
+            for resolution in RESOLUTIONS:
+                key = (asset_id, metric, resolution, bucket_start(timestamp, resolution))
+                bucket = buckets.get(key)
+                if bucket is None:
+                    buckets[key] = {
+                        'samples': 1, 'total': value, 'minimum': value, 'maximum': value,
+                        'last': value, 'last_at': timestamp
+                    }
+                else:
+                    self._merge(bucket, 1, value, value, value, value, timestamp)
+        if not buckets:
+            return 0
+
+        existing = {}
+        for row in db.session.query(MetricRollup).filter(
+            MetricRollup.asset_id.in_({key[0] for key in buckets}),
+            MetricRollup.metric.in_({key[1] for key in buckets}),
+            MetricRollup.bucket >= min(key[3] for key in buckets),
+            MetricRollup.bucket <= max(key[3] for key in buckets)
+        ):
+            existing[(row.asset_id, row.metric, row.resolution, row.bucket)] = row
+
+        inserts, updates = [], []
+        for key, bucket in buckets.items():
+            row = existing.get(key)
+            if row is None:
+                inserts.append(dict(zip(('asset_id', 'metric', 'resolution', 'bucket'), key), **bucket))
+            elif not skip_existing:
+                merged = {
+                    'samples': row.samples, 'total': row.total, 'minimum': row.minimum,
+                    'maximum': row.maximum, 'last': row.last, 'last_at': row.last_at
+                }
+                self._merge(merged, bucket['samples'], bucket['total'], bucket['minimum'],
+                            bucket['maximum'], bucket['last'], bucket['last_at'])
+                updates.append(dict(merged, id=row.id))
+
+        if inserts:
+            db.session.bulk_insert_mappings(MetricRollup, inserts)
+        if updates:
+            db.session.bulk_update_mappings(MetricRollup, updates)
+        return len(inserts) + len(updates)
+
+    @staticmethod
+    def _merge(bucket, samples, total, minimum, maximum, last, last_at):
+        bucket['samples'] += samples
+        bucket['total'] += total
+        bucket['minimum'] = min(bucket['minimum'], minimum)
+        bucket['maximum'] = max(bucket['maximum'], maximum)
+        if last_at >= bucket['last_at']:
+            bucket['last'] = last
+            bucket['last_at'] = last_at
+
+    def record_volatility(self, rows):
+        """Samples for freshly inserted VolatilityRecord mappings"""
+        return self.record(
+            sample
+            for row in rows
+            for sample in (
+                (row['asset_id'], 'volatility', row['timestamp'], row['volatility']),
+                (row['asset_id'], 'rate', row['timestamp'], row['effective_interest_rate'] / 100)
+            )
+        )
+
+    def sample_market(self):
+        """
+        Record utilization (totalBorrowed / totalDeposited) and price of every active asset
+        from one batched on-chain snapshot, and commit. Returns the number of buckets written.
+        """
+        assets = get_asset_registry().active
+        if not assets or self.web3_service is None:
+            return 0
+
+        snapshot = self.web3_service.get_assets_snapshot([asset.symbol for asset in assets])
+        timestamp = datetime.utcnow()
+        samples = []
+        for asset in assets:
+            data = snapshot.get(asset.symbol)
+            if data is None or 'error' in data:
+                current_app.logger.warning(f"Skipping market sample for {asset.symbol}: {data and data['error']}")
+                continue
+            _, total_deposited, total_borrowed = data['details']
+            if total_deposited:
+                samples.append((asset.id, 'utilization', timestamp, total_borrowed / total_deposited))
+            samples.append((asset.id, 'price', timestamp, data['price'] / 10**8))  # Chainlink returns prices with 8 decimals
+
+        try:
+            written = self.record(samples)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return written
+
+    def backfill(self):
+        """
+        Build rollups for history recorded before they existed: volatility and rate from
+        VolatilityRecord rows, price from the daily CoinGecko store. Buckets that already
+        have data are skipped, so running it again is harmless. Commits.
+        """
+        assets_by_coin = defaultdict(list)
+        for asset_id, coin_id in db.session.query(Asset.id, Asset.coingecko_id).filter(Asset.coingecko_id.isnot(None)):
+            assets_by_coin[coin_id].append(asset_id)
+
+        volatility = db.session.query(
+            VolatilityRecord.asset_id, VolatilityRecord.timestamp,
+            VolatilityRecord.volatility, VolatilityRecord.effective_interest_rate
+        ).filter(VolatilityRecord.timestamp.isnot(None)).all()
+        prices = db.session.query(PriceRecord.coin_id, PriceRecord.timestamp, PriceRecord.price).all()
+
+        def samples():
+            for asset_id, timestamp, value, rate in volatility:
+                yield asset_id, 'volatility', timestamp, value
+                yield asset_id, 'rate', timestamp, rate / 100
+            for coin_id, timestamp, price in prices:
+                for asset_id in assets_by_coin.get(coin_id, ()):
+                    yield asset_id, 'price', timestamp, price
+
+        try:
+            written = self.record(samples(), skip_existing=True)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return written
+
+    def query(self, asset_id, metrics, resolution, start, end, limit, after=None):
+        """
+        One page of buckets in [start, end) for several metrics, oldest first.
+        Keyset paginated on the bucket start: pass the returned cursor as `after` for the
+        next page. Returns (points, next_cursor) with one point per bucket.
+        """
+        lower = MetricRollup.bucket > after if after is not None else MetricRollup.bucket >= start
+        filters = (
+            MetricRollup.asset_id == asset_id,
+            MetricRollup.metric.in_(metrics),
+            MetricRollup.resolution == resolution,
+            lower,
+            MetricRollup.bucket < end
+        )
+
+        # Pick the page by bucket first so a bucket's metrics never straddle two pages
+        page = [
+            bucket for (bucket,) in
+            db.session.query(MetricRollup.bucket).filter(*filters).distinct()
+            .order_by(MetricRollup.bucket).limit(limit + 1)
+        ]
+        if not page:
+            return [], None
+        has_more = len(page) > limit
+        page = page[:limit]
+
+        rows = db.session.query(MetricRollup).filter(*filters, MetricRollup.bucket <= page[-1]).order_by(MetricRollup.bucket)
+
+        points = {}
+        for row in rows:
+            point = points.setdefault(row.bucket, {'timestamp': row.bucket.isoformat()})
+            point[row.metric] = {
+                'avg': row.total / row.samples,
+                'min': row.minimum,
+                'max': row.maximum,
+                'last': row.last,
+                'samples': row.samples
+            }
+        return list(points.values()), page[-1] if has_more else None
@@ -1,20 +1,70 @@
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+import random
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 import time
 from flask import current_app
 from app import db
-from app.models.models import Asset, VolatilityRecord
+from app.models.models import Asset, VolatilityRecord, PriceRecord
+from app.services.liquidation_scanner import get_shared_liquidation_scanner
+from app.services.timeseries import TimeSeriesService
+from app.services.asset_registry import get_asset_registry
+
+# HTTP session shared by every price fetch in this process
+_session = None
+_session_lock = threading.Lock()
+
+# While CoinGecko is rate limiting us, every fetch thread waits until this monotonic time
+_rate_limited_until = 0
+_rate_limit_lock = threading.Lock()
+
+def _get_session(pool_size):
+    """Get the process-wide keep-alive session used for price API calls"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
+
+def _wait_for_rate_limit():
+    delay = _rate_limited_until - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
+
+def _set_rate_limited(seconds):
+    global _rate_limited_until
+    with _rate_limit_lock:
+        _rate_limited_until = max(_rate_limited_until, time.monotonic() + seconds)
 
 class VolatilityService:
     def __init__(self):
         self.base_url = "https://api.coingecko.com/api/v3"
         self.api_key = None
+        self.timeout = 10
+        self.max_concurrency = 4
+        self.max_retries = 4
+        self.backoff_base = 1.0
+        self.history_days = 365
         
-        # Try to get API key from config
+        # Try to get API settings from config
         try:
-            self.api_key = current_app.config.get('COINGECKO_API_KEY')
+            config = current_app.config
+            self.base_url = config.get('COINGECKO_BASE_URL') or self.base_url
+            self.api_key = config.get('COINGECKO_API_KEY')
+            self.timeout = config.get('COINGECKO_TIMEOUT', self.timeout)
+            self.max_concurrency = config.get('COINGECKO_MAX_CONCURRENCY', self.max_concurrency)
+            self.max_retries = config.get('COINGECKO_MAX_RETRIES', self.max_retries)
+            self.backoff_base = config.get('COINGECKO_BACKOFF_BASE', self.backoff_base)
+            self.history_days = config.get('PRICE_HISTORY_DAYS', self.history_days)
         except:
             pass
     
@@ -34,9 +84,7 @@ class VolatilityService:
             params['x_cg_pro_api_key'] = self.api_key
         
         try:
-            response = requests.get(self.base_url + endpoint, params=params)
-            response.raise_for_status()
-            data = response.json()
+            data = self._get_json(endpoint, params)
             
             # Extract prices (timestamp, price)
             prices = data.get('prices', [])
@@ -48,4 +96,267 @@ class VolatilityService:
             
             return df
         except Exception as e:
-            current_app
\ No newline at end of file
+            current_app.logger.error(f"Error fetching historical prices for {coin_id}: {str(e)}")
+            return None
+    
+    def get_historical_prices_bulk(self, coin_ids, days=30):
+        """
+        Get historical prices for several coins concurrently.
+        `days` is either one window for every coin or a dict of coin_id -> days.
+        Returns a dict of coin_id -> DataFrame, or None for coins that could not be fetched.
+        """
+        coin_ids = list(dict.fromkeys(coin_ids))
+        if not coin_ids:
+            return {}
+        
+        app = current_app._get_current_object()
+        
+        def fetch(coin_id):
+            with app.app_context():
+                coin_days = days.get(coin_id, 30) if isinstance(days, dict) else days
+                return self.get_historical_prices(coin_id, days=coin_days)
+        
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(coin_ids))) as executor:
+            return dict(zip(coin_ids, executor.map(fetch, coin_ids)))
+    
+    def get_all_historical_prices(self, days=30):
+        """Get historical prices for every active asset with a CoinGecko id, keyed by asset symbol"""
+        assets = Asset.query.filter(Asset.is_active == True, Asset.coingecko_id.isnot(None)).all()
+        prices = self.get_historical_prices_bulk([asset.coingecko_id for asset in assets], days=days)
+        return {asset.symbol: prices.get(asset.coingecko_id) for asset in assets}
+    
+    def refresh_price_history(self, coin_ids=None):
+        """
+        Bring the local price store up to date.
+        Each coin only downloads the days after its last stored point (the last day is re-fetched
+        because its price is still moving); coins with no history are backfilled for history_days.
+        Returns the number of stored rows written.
+        """
+        if coin_ids is None:
+            coin_ids = [
+                coin_id for (coin_id,) in
+                db.session.query(Asset.coingecko_id).filter(Asset.is_active == True, Asset.coingecko_id.isnot(None))
+            ]
+        coin_ids = list(dict.fromkeys(coin_ids))
+        if not coin_ids:
+            return 0
+        
+        last_stored = dict(
+            db.session.query(PriceRecord.coin_id, db.func.max(PriceRecord.timestamp))
+            .filter(PriceRecord.coin_id.in_(coin_ids))
+            .group_by(PriceRecord.coin_id)
+        )
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        days = {
+            coin_id: (today - last_stored[coin_id]).days + 1 if coin_id in last_stored else self.history_days
+            for coin_id in coin_ids
+        }
+        
+        fetched = self.get_historical_prices_bulk(coin_ids, days=days)
+        
+        written = 0
+        try:
+            for coin_id, df in fetched.items():
+                if df is not None and not df.empty:
+                    written += self._store_prices(coin_id, df)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return written
+    
+    def get_price_history(self, coin_ids, days=30):
+        """
+        Read daily prices for several coins from the local store in one query.
+        Returns a dict of coin_id -> DataFrame indexed by timestamp with a 'price' column.
+        """
+        coin_ids = list(dict.fromkeys(coin_ids))
+        cutoff = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
+        rows = db.session.query(PriceRecord.coin_id, PriceRecord.timestamp, PriceRecord.price).filter(
+            PriceRecord.coin_id.in_(coin_ids),
+            PriceRecord.timestamp >= cutoff
+        ).order_by(PriceRecord.coin_id, PriceRecord.timestamp).all()
+        
+        df = pd.DataFrame(rows, columns=['coin_id', 'timestamp', 'price'])
+        history = {coin_id: group.set_index('timestamp')[['price']] for coin_id, group in df.groupby('coin_id')}
+        empty = pd.DataFrame({'price': pd.Series(dtype=float)}, index=pd.DatetimeIndex([], name='timestamp'))
+        return {coin_id: history.get(coin_id, empty) for coin_id in coin_ids}
+    
+    def update_asset_volatility(self, period_days=30):
+        """
+        Recompute volatility and effective interest rate for every active asset.
+        Prices are refreshed incrementally, loaded for all assets as one 2-D array, and the
+        resulting VolatilityRecord rows are inserted in a single transaction.
+        Returns the number of assets updated.
+        """
+        assets = Asset.query.filter(Asset.is_active == True, Asset.coingecko_id.isnot(None)).all()
+        if not assets:
+            return 0
+        coin_ids = list(dict.fromkeys(asset.coingecko_id for asset in assets))
+        
+        # A failed download still leaves the stored history usable
+        try:
+            self.refresh_price_history(coin_ids)
+        except Exception as e:
+            current_app.logger.error(f"Error refreshing price history: {str(e)}")
+        
+        coin_index, prices = self._get_price_matrix(coin_ids, days=period_days)
+        volatility = self.calculate_volatility(prices)
+        
+        rows = []
+        timestamp = datetime.utcnow()
+        for asset in assets:
+            asset_volatility = volatility[coin_index[asset.coingecko_id]] if asset.coingecko_id in coin_index else np.nan
+            if np.isnan(asset_volatility):
+                current_app.logger.warning(f"Not enough price data to compute volatility for {asset.symbol}")
+                continue
+            rows.append({
+                'asset_id': asset.id,
+                'volatility': float(asset_volatility),
+                'period_days': period_days,
+                'effective_interest_rate': self.calculate_interest_rate(
+                    asset.base_interest_rate, asset.volatility_multiplier, asset_volatility
+                ),
+                'timestamp': timestamp
+            })
+        
+        if not rows:
+            return 0
+        try:
+            db.session.bulk_insert_mappings(VolatilityRecord, rows)
+            TimeSeriesService().record_volatility(rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return len(rows)
+    
+    @staticmethod
+    def calculate_volatility(prices):
+        """
+        Standard deviation of daily log returns for every row of a (assets x days) price array.
+        Missing prices are NaN; rows with fewer than two returns get NaN.
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        if prices.ndim != 2 or prices.shape[1] < 3:
+            return np.full(prices.shape[0] if prices.ndim == 2 else 0, np.nan)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.diff(np.log(np.where(prices > 0, prices, np.nan)), axis=1)
+        valid = np.sum(~np.isnan(returns), axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.nansum(returns, axis=1) / valid
+            variance = np.nansum((returns - mean[:, None]) ** 2, axis=1) / (valid - 1)
+        return np.where(valid >= 2, np.sqrt(variance), np.nan)
+    
+    @staticmethod
+    def calculate_interest_rate(base_interest_rate, volatility_multiplier, volatility):
+        """
+        Effective interest rate in basis points.
+        volatility_multiplier is the extra basis points charged per percentage point of daily volatility.
+        """
+        return int(base_interest_rate + round(volatility * 100 * volatility_multiplier))
+    
+    def _get_price_matrix(self, coin_ids, days=30):
+        """
+        Load stored daily prices for several coins as one array in a single query.
+        Returns ({coin_id: row}, prices) where prices is (coins x days) with NaN for missing days.
+        """
+        cutoff = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
+        rows = db.session.query(PriceRecord.coin_id, PriceRecord.timestamp, PriceRecord.price).filter(
+            PriceRecord.coin_id.in_(coin_ids),
+            PriceRecord.timestamp >= cutoff
+        ).all()
+        if not rows:
+            return {}, np.empty((0, 0))
+        
+        matrix = pd.DataFrame(rows, columns=['coin_id', 'timestamp', 'price']).pivot(
+            index='coin_id', columns='timestamp', values='price'
+        ).sort_index(axis=1)
+        return {coin_id: i for i, coin_id in enumerate(matrix.index)}, matrix.to_numpy(dtype=np.float64)
+    
+    def _store_prices(self, coin_id, df):
+        """Upsert one coin's prices into the local store, keeping the latest price seen for each UTC day"""
+        daily = df['price'].groupby(df.index.floor('D')).last()
+        existing = dict(
+            db.session.query(PriceRecord.timestamp, PriceRecord.id).filter(
+                PriceRecord.coin_id == coin_id,
+                PriceRecord.timestamp >= daily.index.min().to_pydatetime()
+            )
+        )
+        
+        inserts, updates = [], []
+        for timestamp, price in daily.items():
+            timestamp = timestamp.to_pydatetime()
+            if timestamp in existing:
+                updates.append({'id': existing[timestamp], 'price': float(price)})
+            else:
+                inserts.append({'coin_id': coin_id, 'timestamp': timestamp, 'price': float(price)})
+        
+        if inserts:
+            db.session.bulk_insert_mappings(PriceRecord, inserts)
+        if updates:
+            db.session.bulk_update_mappings(PriceRecord, updates)
+        return len(inserts) + len(updates)
+    
+    def _get_json(self, endpoint, params):
+        """
+        GET a CoinGecko endpoint over the shared session.
+        Rate limits (429) and server errors are retried with jittered exponential backoff,
+        honouring Retry-After and pausing all fetch threads while rate limited.
+        """
+        session = _get_session(self.max_concurrency)
+        for attempt in range(self.max_retries + 1):
+            _wait_for_rate_limit()
+            try:
+                response = session.get(self.base_url + endpoint, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+            
+            if response.status_code == 429 or response.status_code >= 500:
+                if attempt == self.max_retries:
+                    response.raise_for_status()
+                delay = self._backoff(attempt)
+                if response.status_code == 429:
+                    retry_after = response.headers.get('Retry-After')
+                    if retry_after and retry_after.isdigit():
+                        delay = max(delay, int(retry_after))
+                    _set_rate_limited(delay)
+                    current_app.logger.warning(f"CoinGecko rate limit hit, backing off {delay:.1f}s")
+                else:
+                    time.sleep(delay)
+                continue
+            
+            response.raise_for_status()
+            return response.json()
+    
+    def _backoff(self, attempt):
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, self.backoff_base * (2 ** attempt))
+
+    def get_liquidation_candidates(self, threshold=1.05, prices=None):
+        """
+        Get positions whose health factor is below `threshold`, ranked by USD shortfall.
+        Prices default to the on-chain price feeds and are only used for ranking.
+        """
+        if prices is None:
+            prices = self._get_asset_prices()
+        return get_shared_liquidation_scanner().scan(prices=prices, threshold=threshold)
+    
+    def _get_asset_prices(self):
+        """Get USD prices for all active assets from the contract in one batched call"""
+        from app.services.web3_service import get_shared_web3_service
+        
+        symbols = get_asset_registry().active_symbols()
+        try:
+            snapshot = get_shared_web3_service().get_assets_snapshot(symbols)
+        except Exception as e:
+            current_app.logger.error(f"Error fetching asset prices: {str(e)}")
+            return {}
+        return {
+            symbol: data['price'] / 10**8  # Chainlink returns prices with 8 decimals
+            for symbol, data in snapshot.items() if 'error' not in data
+        }
\ No newline at end of file
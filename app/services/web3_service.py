@@ -1,69 +1,166 @@
 import json
 import os
+import threading
 import time
-from functools import wraps
+from functools import lru_cache
+import requests
+from requests.adapters import HTTPAdapter
 from web3 import Web3
-from web3.providers import HTTPProvider
-from flask import current_app
+from web3._utils.abi import get_abi_output_types, map_abi_data
+from web3._utils.method_formatters import log_entry_formatter
+from web3._utils.normalizers import BASE_RETURN_NORMALIZERS
+from web3.exceptions import ContractLogicError
+from flask import current_app, g, has_request_context
+from app.services.call_cache import create_call_cache
+from app.services.rpc_policy import RetryPolicy, is_transient_error
+from app.services.provider_pool import ProviderPool
+from app.services.gas_oracle import GasEstimateCache, FeeHistoryPoller
 
-def retry_on_failure(max_retries=3, delay=1):
-    """Decorator to retry Web3 operations on failure"""
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            last_error = None
-            for attempt in range(max_retries):
-                try:
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    last_error = e
-                    if attempt < max_retries - 1:
-                        time.sleep(delay * (attempt + 1))
-                    continue
-            raise last_error
-        return wrapper
-    return decorator
+# Process-wide service shared by all requests in a worker
+_shared_service = None
+_shared_service_pid = None
+_shared_service_lock = threading.Lock()
+
+BATCH_OPERATION_TYPES = ('deposit', 'withdraw', 'borrow', 'repay')
+
+# getAssetDetails returns an all-zero tuple for unknown symbols instead of reverting
+ZERO_ADDRESS = '0x' + '0' * 40
+
+# Minimal ERC20 ABI for balance checks
+ERC20_BALANCE_OF_ABI = [{
+    "constant": True,
+    "inputs": [{"name": "account", "type": "address"}],
+    "name": "balanceOf",
+    "outputs": [{"name": "", "type": "uint256"}],
+    "type": "function"
+}]
+
+@lru_cache(maxsize=None)
+def _load_contract_abi(path):
+    """Read and parse a contract ABI file once per process"""
+    with open(path, 'r') as f:
+        abi_data = json.load(f)
+    return abi_data.get('abi', abi_data) if isinstance(abi_data, dict) else abi_data  # Handle both full Hardhat artifact and raw ABI
+
+def find_contract_abi():
+    """Find the DynamicLendingPool ABI in the locations Hardhat and the deploy scripts write it to"""
+    possible_paths = [
+        os.path.join(os.path.dirname(__file__), '../../contracts/abi/DynamicLendingPool.json'),
+        os.path.join(os.path.dirname(__file__), '../../artifacts/contracts/DynamicLendingPool.sol/DynamicLendingPool.json'),
+        os.path.join(os.path.dirname(__file__), '../../contracts/DynamicLendingPool.sol/DynamicLendingPool.json')
+    ]
+    
+    for path in possible_paths:
+        if os.path.exists(path):
+            return path
+    
+    raise FileNotFoundError("Could not find contract ABI file")
+
+def _error_message(error):
+    """Human readable message for web3 exceptions, which carry (message, data) args"""
+    return getattr(error, 'message', None) or str(error)
+
+def get_shared_web3_service():
+    """Get the Web3Service shared by every request in this worker process"""
+    global _shared_service, _shared_service_pid
+    
+    # Rebuild after a fork so workers never share the parent's sockets
+    pid = os.getpid()
+    if _shared_service is None or _shared_service_pid != pid:
+        with _shared_service_lock:
+            if _shared_service is None or _shared_service_pid != pid:
+                config = current_app.config
+                _shared_service = Web3Service(
+                    provider_uri=config['WEB3_PROVIDER_URI'],
+                    provider_uris=config.get('WEB3_PROVIDER_URIS'),
+                    contract_address=config['CONTRACT_ADDRESS'],
+                    pool_size=config.get('WEB3_POOL_SIZE', 20),
+                    request_timeout=config.get('WEB3_REQUEST_TIMEOUT', 10),
+                    cache=create_call_cache(config),
+                    block_poll_interval=config.get('WEB3_BLOCK_POLL_INTERVAL', 1),
+                    retry_policy=RetryPolicy.from_config(config),
+                    breaker_threshold=config.get('WEB3_BREAKER_THRESHOLD', 5),
+                    breaker_reset=config.get('WEB3_BREAKER_RESET', 30),
+                    gas_estimates=GasEstimateCache.from_config(config),
+                    fee_poll_interval=config.get('FEE_POLL_INTERVAL', 12)
+                )
+                _shared_service_pid = pid
+    return _shared_service
 
 class Web3Service:
-    def __init__(self, provider_uri=None, contract_address=None, contract_abi_path=None):
+    def __init__(self, provider_uri=None, contract_address=None, contract_abi_path=None,
+                 pool_size=20, request_timeout=10, cache=None, block_poll_interval=1,
+                 retry_policy=None, breaker_threshold=5, breaker_reset=30, provider_uris=None,
+                 gas_estimates=None, fee_poll_interval=12):
         # Use provided values or defaults from config
         self.provider_uri = provider_uri
+        self.provider_uris = list(provider_uris or ([provider_uri] if provider_uri else []))
         self.contract_address = contract_address
         self.contract_abi_path = contract_abi_path
+        self.pool_size = pool_size
+        self.request_timeout = request_timeout
         self.w3 = None
         self.contract = None
+        self._session = None
+        self._pool = None
+        self._erc20_contracts = {}
+        self._token_addresses = {}
+        self._init_lock = threading.Lock()
+        
+        # Block-aware cache for view calls; None disables caching
+        self.cache = cache
+        self.block_poll_interval = block_poll_interval
+        self._block_number = None
+        self._block_checked_at = 0
         
-        # Initialize connection and contract
-        self._initialize()
+        # Transient RPC failures fail over between providers and are retried within a deadline;
+        # each provider has its own circuit breaker in the pool
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+        
+        # Gas limits per (function, asset) and fee suggestions shared by all transaction preparations
+        self.gas_estimates = gas_estimates or GasEstimateCache()
+        self.fee_poller = FeeHistoryPoller(self, poll_interval=fee_poll_interval)
+        
+        # Connection and contract are set up lazily on first use
+    
+    def _create_session(self):
+        """Create a keep-alive HTTP session sized for concurrent request threads"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max(1, len(self.provider_uris)), pool_maxsize=self.pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
     
     def _find_contract_abi(self):
         """Find contract ABI in various possible locations"""
-        possible_paths = [
-            os.path.join(os.path.dirname(__file__), '../../contracts/abi/DynamicLendingPool.json'),
-            os.path.join(os.path.dirname(__file__), '../../artifacts/contracts/DynamicLendingPool.sol/DynamicLendingPool.json'),
-            os.path.join(os.path.dirname(__file__), '../../contracts/DynamicLendingPool.sol/DynamicLendingPool.json')
-        ]
-        
-        for path in possible_paths:
-            if os.path.exists(path):
-                return path
-        
-        raise FileNotFoundError("Could not find contract ABI file")
+        return find_contract_abi()
     
-    @retry_on_failure(max_retries=3, delay=1)
     def _initialize(self):
-        """Initialize Web3 connection and contract with retry mechanism"""
+        """Initialize Web3 connection and contract"""
         try:
-            # Get provider URI from config if not provided
-            if not self.provider_uri:
-                self.provider_uri = current_app.config['WEB3_PROVIDER_URI']
+            # Get provider URIs from config if not provided
+            if not self.provider_uris:
+                config = current_app.config
+                self.provider_uris = list(config.get('WEB3_PROVIDER_URIS') or [config['WEB3_PROVIDER_URI']])
+            self.provider_uri = self.provider_uri or self.provider_uris[0]
             
-            # Connect to provider
-            provider = HTTPProvider(self.provider_uri)
-            self.w3 = Web3(provider)
+            # Connect to the providers over a pooled keep-alive session
+            if self._session is None:
+                self._session = self._create_session()
+            if self._pool is None:
+                self._pool = ProviderPool(
+                    self.provider_uris,
+                    self._session,
+                    request_timeout=self.request_timeout,
+                    failure_threshold=self.breaker_threshold,
+                    reset_timeout=self.breaker_reset
+                )
+            w3 = Web3(self._pool)
             
             # Check connection
-            if not self.w3.is_connected():
+            if not w3.is_connected():
                 raise ConnectionError("Failed to connect to Web3 provider")
             
             # Get contract address from config if not provided
@@ -76,15 +173,14 @@ class Web3Service:
             if not self.contract_abi_path:
                 self.contract_abi_path = self._find_contract_abi()
             
-            with open(self.contract_abi_path, 'r') as f:
-                abi_data = json.load(f)
-                contract_abi = abi_data.get('abi', abi_data)  # Handle both full Hardhat artifact and raw ABI
+            contract_abi = _load_contract_abi(os.path.abspath(self.contract_abi_path))
             
-            # Initialize contract
-            self.contract = self.w3.eth.contract(
+            # Initialize contract, publishing w3 last so other threads never see a half-built service
+            self.contract = w3.eth.contract(
                 address=Web3.to_checksum_address(self.contract_address),
                 abi=contract_abi
             )
+            self.w3 = w3
             
             current_app.logger.info("Web3Service initialized successfully")
         except Exception as e:
@@ -108,32 +204,88 @@ class Web3Service:
                 raise ValueError
         except ValueError:
             raise ValueError("Invalid amount")
-            
-        # Check if asset exists
+        
+        # Asset existence is checked by _get_transaction_state, in the same batch as the other lookups
+        return True
+
+    def _current_block_number(self):
+        """Latest block number, polled from the node at most once per block_poll_interval"""
+        now = time.monotonic()
+        if self._block_number is None or now - self._block_checked_at >= self.block_poll_interval:
+            self._block_number = self._call(lambda: self.w3.eth.block_number)
+            self._block_checked_at = now
+        return self._block_number
+    
+    def _cache_block(self):
+        """Block number to key cache entries on, or None when caching is off or unavailable"""
+        if self.cache is None:
+            return None
         try:
-            asset_details = self.contract.functions.getAssetDetails(symbol).call()
-            if not asset_details:
-                raise ValueError(f"Asset {symbol} not found")
+            return self._current_block_number()
         except Exception as e:
-            raise ValueError(f"Failed to validate asset: {str(e)}")
-            
-        return True
+            current_app.logger.warning(f"Could not read block number, bypassing call cache: {str(e)}")
+            return None
+    
+    def _cached_call(self, fn_name, *args):
+        """Call a contract view function, serving repeated calls within a block from the cache"""
+        block_number = self._cache_block()
+        if block_number is not None:
+            hit, value = self.cache.get(fn_name, args, block_number)
+            if hit:
+                return value
+        
+        try:
+            value = self._call(getattr(self.contract.functions, fn_name)(*args).call)
+        except Exception as e:
+            hit, value = self._stale_value(fn_name, args, e)
+            if not hit:
+                raise
+            return value
+        
+        if block_number is not None:
+            self.cache.set(fn_name, args, block_number, value)
+        return value
+    
+    def _call(self, fn):
+        """Run a provider request under the retry policy; failover happens inside the provider pool"""
+        return self.retry_policy.call(fn)
+    
+    def _stale_value(self, fn_name, args, error):
+        """Return (hit, value) from the stale cache when `error` means the provider is unavailable"""
+        if self.cache is None or not is_transient_error(error):
+            return False, None
+        hit, value = self.cache.get_stale(fn_name, args)
+        if hit:
+            current_app.logger.warning(f"Serving stale {fn_name}{tuple(args)}: {_error_message(error)}")
+        return hit, value
+    
+    def provider_status(self):
+        """Breaker state, latency and error rate of every provider, without contacting them"""
+        if self._pool is None:
+            return [{'uri': uri, 'state': 'not connected'} for uri in self.provider_uris]
+        return self._pool.status()
+    
+    def cache_stats(self):
+        """Hit/miss counters of the view call cache"""
+        if self.cache is None:
+            return {'backend': 'none'}
+        stats = self.cache.stats()
+        stats['blockNumber'] = self._block_number
+        return stats
 
-    @retry_on_failure(max_retries=3, delay=1)
     def get_asset_details(self, symbol):
-        """Get asset details from smart contract with retry mechanism"""
+        """Get asset details from smart contract"""
         if not self._check_initialized():
             return None
         
-        return self.contract.functions.getAssetDetails(symbol).call()
+        return self._cached_call('getAssetDetails', symbol)
 
-    @retry_on_failure(max_retries=3, delay=1)
     def get_asset_price(self, symbol):
-        """Get asset price from smart contract with retry mechanism"""
+        """Get asset price from smart contract"""
         if not self._check_initialized():
             return None
         
-        return self.contract.functions.getAssetPrice(symbol).call()
+        return self._cached_call('getAssetPrice', symbol)
 
     def get_all_asset_symbols(self):
         """Get all supported asset symbols"""
@@ -141,21 +293,72 @@ class Web3Service:
             return []
         
         try:
-            return self.contract.functions.getAllAssetSymbols().call()
+            return self._cached_call('getAllAssetSymbols')
         except Exception as e:
             current_app.logger.error(f"Error getting asset symbols: {str(e)}")
             raise
 
-    @retry_on_failure(max_retries=3, delay=1)
     def get_user_position(self, user_address, symbol):
-        """Get user's position with retry mechanism"""
+        """Get user's position"""
         if not self._check_initialized():
             return None
         
-        return self.contract.functions.getUserPosition(
+        return self._call(self.contract.functions.getUserPosition(
             Web3.to_checksum_address(user_address),
             symbol
-        ).call()
+        ).call)
+
+    def get_user_positions(self, user_address, symbols):
+        """
+        Get a user's positions for several assets in one batched round trip.
+        Returns a dict keyed by symbol; failed lookups carry an 'error' entry instead of being retried.
+        """
+        if not self._check_initialized():
+            return {}
+        
+        user = Web3.to_checksum_address(user_address)
+        results = self._batch_call([
+            self.contract.functions.getUserPosition(user, symbol) for symbol in symbols
+        ])
+        
+        positions = {}
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                positions[symbol] = {'error': _error_message(result)}
+            else:
+                deposited, borrowed, interest_due = result
+                positions[symbol] = {
+                    'deposited': deposited,
+                    'borrowed': borrowed,
+                    'interest_due': interest_due
+                }
+        return positions
+
+    def get_position_states(self, pairs, block_identifier='latest'):
+        """
+        Get raw userPositions storage (deposited, borrowed, lastInterestUpdate, interestIndex)
+        for (user_address, symbol) pairs in one batched round trip, as of `block_identifier`.
+        Returns a list aligned with `pairs`; failed lookups are exception objects.
+        """
+        if not self._check_initialized():
+            return []
+        
+        return self._batch_call([
+            self.contract.functions.userPositions(Web3.to_checksum_address(user), symbol)
+            for user, symbol in pairs
+        ], block_identifier)
+    
+    def get_asset_configs(self, symbols, block_identifier='latest'):
+        """
+        Get the assets() struct (tokenAddress, priceFeed, decimals, baseInterestRate,
+        collateralFactor, currentInterestRate, totalDeposited, totalBorrowed, isActive) of
+        several assets in one batched round trip, as of `block_identifier`.
+        Returns a list aligned with `symbols`; failed lookups are exception objects.
+        """
+        if not self._check_initialized():
+            return []
+        
+        return self._batch_call([self.contract.functions.assets(symbol) for symbol in symbols], block_identifier)
 
     def get_current_interest_rate(self, symbol):
         """Get current interest rate for an asset"""
@@ -163,38 +366,285 @@ class Web3Service:
             return None
         
         try:
-            return self.contract.functions.getCurrentInterestRate(symbol).call()
+            return self._cached_call('getCurrentInterestRate', symbol)
         except Exception as e:
             current_app.logger.error(f"Error getting interest rate for {symbol}: {str(e)}")
             raise
     
+    def _batch_call(self, calls, block_identifier='latest'):
+        """
+        Execute several contract view calls in a single JSON-RPC batch, at `block_identifier`
+        (a block number or tag). Returns one entry per call: the decoded result, or the
+        exception raised for that call.
+        """
+        if not calls:
+            return []
+        
+        block = hex(block_identifier) if isinstance(block_identifier, int) else block_identifier
+        try:
+            replies = self._batch_request([
+                ('eth_call', [{'to': call.address, 'data': call._encode_transaction_data()}, block])
+                for call in calls
+            ])
+        except Exception as e:
+            if is_transient_error(e):
+                return [e] * len(calls)
+            # Fall back to one call at a time so a node without batch support still works
+            current_app.logger.warning(f"Batch call failed, falling back to sequential calls: {str(e)}")
+            return [self._safe_call(call, block_identifier) for call in calls]
+        
+        results = []
+        for call, reply in zip(calls, replies):
+            if reply is None:
+                results.append(ValueError("Missing response in batch"))
+            elif 'error' in reply:
+                results.append(ContractLogicError(reply['error'].get('message', 'execution reverted')))
+            else:
+                try:
+                    results.append(self._decode_call_result(call, reply['result']))
+                except Exception as e:
+                    results.append(e)
+        return results
+    
+    def _batch_request(self, rpc_calls):
+        """
+        Send (method, params) pairs to the node as one JSON-RPC batch.
+        Returns the raw replies in request order; a reply missing from the response is None.
+        """
+        payload = [
+            {'jsonrpc': '2.0', 'id': i, 'method': method, 'params': params}
+            for i, (method, params) in enumerate(rpc_calls)
+        ]
+        replies = self._call(lambda: self._pool.make_batch_request(payload))
+        if not isinstance(replies, list):
+            raise ValueError("Provider does not support JSON-RPC batch requests")
+        
+        replies_by_id = {reply.get('id'): reply for reply in replies}
+        return [replies_by_id.get(i) for i in range(len(payload))]
+    
+    def _cached_batch_call(self, calls):
+        """
+        Batch variant of _cached_call taking (fn_name, args) pairs.
+        Only cache misses are sent to the node; successful results are stored for the current block.
+        """
+        block_number = self._cache_block()
+        results = [None] * len(calls)
+        pending = []
+        for i, (fn_name, args) in enumerate(calls):
+            if block_number is not None:
+                hit, value = self.cache.get(fn_name, args, block_number)
+                if hit:
+                    results[i] = value
+                    continue
+            pending.append(i)
+        
+        fetched = self._batch_call([
+            getattr(self.contract.functions, calls[i][0])(*calls[i][1]) for i in pending
+        ])
+        for i, value in zip(pending, fetched):
+            if isinstance(value, Exception):
+                hit, stale = self._stale_value(calls[i][0], calls[i][1], value)
+                results[i] = stale if hit else value
+            else:
+                results[i] = value
+                if block_number is not None:
+                    self.cache.set(calls[i][0], calls[i][1], block_number, value)
+        return results
+    
+    def _decode_call_result(self, call, data):
+        """Decode raw eth_call output the same way ContractFunction.call() does"""
+        output_types = get_abi_output_types(call.abi)
+        raw = Web3.to_bytes(hexstr=data)
+        if not raw and output_types:
+            raise ContractLogicError("Call returned no data")
+        decoded = self.w3.codec.decode(output_types, raw)
+        normalized = map_abi_data(BASE_RETURN_NORMALIZERS, output_types, decoded)
+        return normalized[0] if len(normalized) == 1 else list(normalized)
+    
+    def _safe_call(self, call, block_identifier='latest'):
+        """Execute a single view call, returning the exception instead of raising it"""
+        try:
+            return self._call(lambda: call.call(block_identifier=block_identifier))
+        except Exception as e:
+            return e
+    
+    def get_assets_snapshot(self, symbols):
+        """
+        Get details, current interest rate and price for several assets in one round trip.
+        Returns a dict keyed by symbol; assets whose calls failed carry an 'error' entry.
+        """
+        if not self._check_initialized():
+            return {}
+        
+        calls = [
+            (fn_name, (symbol,))
+            for symbol in symbols
+            for fn_name in ('getAssetDetails', 'getCurrentInterestRate', 'getAssetPrice')
+        ]
+        results = self._cached_batch_call(calls)
+        
+        snapshot = {}
+        for i, symbol in enumerate(symbols):
+            details, interest_rate, price = results[i * 3:i * 3 + 3]
+            error = next((r for r in (details, interest_rate, price) if isinstance(r, Exception)), None)
+            if error is not None:
+                snapshot[symbol] = {'error': _error_message(error)}
+            else:
+                snapshot[symbol] = {
+                    'details': details,
+                    'interest_rate': interest_rate,
+                    'price': price
+                }
+        return snapshot
+    
+    def _request_memo(self):
+        """Per-request store of view call results, so identical calls within one request reach the node once"""
+        if not has_request_context():
+            return None
+        if 'web3_call_memo' not in g:
+            g.web3_call_memo = {}
+        return g.web3_call_memo
+    
+    def _memoized_batch_call(self, calls):
+        """_batch_call that skips calls already made in this request and sends duplicates once"""
+        memo = self._request_memo()
+        keys = [(call.address, call.fn_name, json.dumps(list(call.args), default=str)) for call in calls]
+        results = [None] * len(calls)
+        pending = {}
+        for i, key in enumerate(keys):
+            if memo is not None and key in memo:
+                results[i] = memo[key]
+            else:
+                pending.setdefault(key, []).append(i)
+        
+        fetched = self._batch_call([calls[indexes[0]] for indexes in pending.values()])
+        for (key, indexes), value in zip(pending.items(), fetched):
+            for i in indexes:
+                results[i] = value
+            if memo is not None and not isinstance(value, Exception):
+                memo[key] = value
+        return results
+    
+    def _erc20_contract(self, token_address):
+        """ERC20 contract object for balance checks, built once per token address"""
+        address = Web3.to_checksum_address(token_address)
+        contract = self._erc20_contracts.get(address)
+        if contract is None:
+            contract = self.w3.eth.contract(address=address, abi=ERC20_BALANCE_OF_ABI)
+            self._erc20_contracts[address] = contract
+        return contract
+    
+    def _get_transaction_state(self, user_address, symbol, position=False, balance=False, asset_config=False):
+        """
+        Fetch everything a transaction builder checks in one batched round trip.
+        Always includes getAssetDetails to validate the asset; optionally the user's position,
+        the assets() struct and the user's token balance.
+        """
+        wanted = {name for name, flag in (('position', position), ('balance', balance), ('config', asset_config)) if flag}
+        return self._get_transaction_states(user_address, {symbol: wanted})[symbol]
+    
+    def _get_transaction_states(self, user_address, lookups):
+        """
+        Multi-asset form of _get_transaction_state: `lookups` maps symbol to the set of extra
+        lookups wanted ('position', 'balance', 'config'), all sent as one batch. Token addresses
+        never change, so once known the balance lookups join the same batch.
+        """
+        user = Web3.to_checksum_address(user_address)
+        functions = self.contract.functions
+        keys = []
+        calls = []
+        for symbol, wanted in lookups.items():
+            keys.append((symbol, 'details'))
+            calls.append(functions.getAssetDetails(symbol))
+            if 'position' in wanted:
+                keys.append((symbol, 'position'))
+                calls.append(functions.getUserPosition(user, symbol))
+            if 'config' in wanted:
+                keys.append((symbol, 'config'))
+                calls.append(functions.assets(symbol))
+            token_address = self._token_addresses.get(symbol)
+            if 'balance' in wanted and token_address:
+                keys.append((symbol, 'balance'))
+                calls.append(self._erc20_contract(token_address).functions.balanceOf(user))
+        
+        states = {symbol: {} for symbol in lookups}
+        for (symbol, name), value in zip(keys, self._memoized_batch_call(calls)):
+            states[symbol][name] = value
+        
+        missing_balances = []
+        for symbol, state in states.items():
+            details = state['details']
+            if isinstance(details, Exception):
+                raise ValueError(f"Failed to validate asset: {_error_message(details)}")
+            if not details or details[0] == ZERO_ADDRESS:
+                raise ValueError(f"Asset {symbol} not found")
+            self._token_addresses[symbol] = details[0]
+            if 'balance' in lookups[symbol] and 'balance' not in state:
+                missing_balances.append(symbol)
+        
+        if missing_balances:
+            balances = self._memoized_batch_call([
+                self._erc20_contract(states[symbol]['details'][0]).functions.balanceOf(user)
+                for symbol in missing_balances
+            ])
+            for symbol, value in zip(missing_balances, balances):
+                states[symbol]['balance'] = value
+        
+        for state in states.values():
+            for value in state.values():
+                if isinstance(value, Exception):
+                    raise value
+        return states
+    
+    def _gas_fields(self, fn_name, symbol, user_address, tx, estimate=True):
+        """
+        Gas limit and fee suggestion for a prepared transaction.
+        Limits come from the per-(function, asset) cache; on a miss the node estimates this
+        transaction once for everyone. `gas` is None when no limit is known (the estimate
+        reverted, e.g. before an ERC-20 approval), leaving the wallet to estimate it.
+        Fees come from the shared fee history poller.
+        """
+        gas = self.gas_estimates.get(fn_name, symbol)
+        if gas is None and estimate and not self.gas_estimates.recently_failed(fn_name, symbol):
+            try:
+                gas_estimate = self._call(lambda: self.w3.eth.estimate_gas({
+                    'from': Web3.to_checksum_address(user_address),
+                    'to': self.contract.address,
+                    'data': tx['data'],
+                    'value': int(tx.get('value') or 0)
+                }))
+            except Exception as e:
+                # Typically a revert for this user (e.g. missing allowance)
+                current_app.logger.warning(f"Gas estimation for {fn_name} {symbol} failed: {_error_message(e)}")
+                gas_estimate = None
+            gas = self.gas_estimates.update(fn_name, symbol, gas_estimate)
+        
+        fields = {'gas': gas}
+        fees = self.fee_poller.suggestion()
+        if fees and 'gasPrice' in fees:
+            fields['gasPrice'] = fees['gasPrice']
+        elif fees:
+            fields['maxFeePerGas'] = fees['standard']['maxFeePerGas']
+            fields['maxPriorityFeePerGas'] = fees['standard']['maxPriorityFeePerGas']
+        return fields
+    
+    def get_fee_suggestion(self):
+        """Current slow/standard/fast fee suggestion from the shared poller"""
+        if not self._check_initialized():
+            return None
+        return self.fee_poller.suggestion()
+    
     def create_deposit_transaction(self, user_address, symbol, amount):
         """Create deposit transaction data"""
         self._validate_transaction_params(user_address, symbol, amount)
         
         try:
-            # Get token address
-            asset_details = self.contract.functions.getAssetDetails(symbol).call()
-            token_address = asset_details[0]
+            # Asset details and user balance in one round trip
+            state = self._get_transaction_state(user_address, symbol, balance=symbol != 'ETH')
             
             # Check user balance
-            if symbol != 'ETH':
-                token_contract = self.w3.eth.contract(
-                    address=Web3.to_checksum_address(token_address),
-                    abi=[{
-                        "constant": True,
-                        "inputs": [{"name": "account", "type": "address"}],
-                        "name": "balanceOf",
-                        "outputs": [{"name": "", "type": "uint256"}],
-                        "type": "function"
-                    }]
-                )
-                balance = token_contract.functions.balanceOf(
-                    Web3.to_checksum_address(user_address)
-                ).call()
-                
-                if balance < int(amount):
-                    raise ValueError("Insufficient token balance")
+            if symbol != 'ETH' and state['balance'] < int(amount):
+                raise ValueError("Insufficient token balance")
             
             # Prepare transaction data
             tx_data = self.contract.encodeABI(
@@ -202,28 +652,31 @@ class Web3Service:
                 args=[symbol, int(amount)]
             )
             
-            return {
+            tx = {
                 'to': self.contract_address,
                 'data': tx_data,
                 'value': str(amount) if symbol == 'ETH' else '0',
                 'requiresApproval': symbol != 'ETH'
             }
+            tx.update(self._gas_fields('deposit', symbol, user_address, tx))
+            return tx
         except Exception as e:
             current_app.logger.error(f"Error creating deposit transaction: {str(e)}")
             raise
     
     def create_withdraw_transaction(self, user_address, symbol, amount):
         """Create withdraw transaction data for frontend"""
-        if not self._check_initialized():
-            return None
+        self._validate_transaction_params(user_address, symbol, amount)
         
         try:
-            return {
+            tx = {
                 'to': self.contract_address,
                 'from': user_address,
-                'data': self.contract.encodeABI('withdraw', args=[symbol, amount]),
-                'gas': 300000,  # Estimated gas
+                'data': self.contract.encodeABI('withdraw', args=[symbol, int(amount)]),
+                'value': '0'
             }
+            tx.update(self._gas_fields('withdraw', symbol, user_address, tx))
+            return tx
         except Exception as e:
             current_app.logger.error(f"Error creating withdraw transaction: {str(e)}")
             raise
@@ -233,16 +686,10 @@ class Web3Service:
         self._validate_transaction_params(user_address, symbol, amount)
         
         try:
-            # Check if user has enough collateral
-            position = self.contract.functions.getUserPosition(
-                Web3.to_checksum_address(user_address),
-                symbol
-            ).call()
-            
-            # Get collateral factor and calculate max borrow
-            asset_details = self.contract.functions.getAssetDetails(symbol).call()
-            collateral_factor = asset_details[3]  # Assuming this is the collateral factor
-            max_borrow = (int(position[0]) * collateral_factor) // 10000  # Convert from basis points
+            # Position and collateral factor in one round trip
+            state = self._get_transaction_state(user_address, symbol, position=True, asset_config=True)
+            collateral_factor = state['config'][4]  # assets() struct: collateralFactor
+            max_borrow = (int(state['position'][0]) * collateral_factor) // 10000  # Convert from basis points
             
             if int(amount) > max_borrow:
                 raise ValueError("Insufficient collateral for borrow amount")
@@ -253,11 +700,13 @@ class Web3Service:
                 args=[symbol, int(amount)]
             )
             
-            return {
+            tx = {
                 'to': self.contract_address,
                 'data': tx_data,
                 'value': '0'
             }
+            tx.update(self._gas_fields('borrow', symbol, user_address, tx))
+            return tx
         except Exception as e:
             current_app.logger.error(f"Error creating borrow transaction: {str(e)}")
             raise
@@ -267,38 +716,16 @@ class Web3Service:
         self._validate_transaction_params(user_address, symbol, amount)
         
         try:
-            # Get token address
-            asset_details = self.contract.functions.getAssetDetails(symbol).call()
-            token_address = asset_details[0]
-            
-            # Check borrowed amount
-            position = self.contract.functions.getUserPosition(
-                Web3.to_checksum_address(user_address),
-                symbol
-            ).call()
+            # Borrowed amount and user balance in one round trip
+            state = self._get_transaction_state(user_address, symbol, position=True, balance=symbol != 'ETH')
             
-            borrowed_amount = position[1]
+            borrowed_amount = state['position'][1]
             if int(amount) > borrowed_amount:
                 raise ValueError("Repay amount exceeds borrowed amount")
             
             # Check user balance for non-ETH assets
-            if symbol != 'ETH':
-                token_contract = self.w3.eth.contract(
-                    address=Web3.to_checksum_address(token_address),
-                    abi=[{
-                        "constant": True,
-                        "inputs": [{"name": "account", "type": "address"}],
-                        "name": "balanceOf",
-                        "outputs": [{"name": "", "type": "uint256"}],
-                        "type": "function"
-                    }]
-                )
-                balance = token_contract.functions.balanceOf(
-                    Web3.to_checksum_address(user_address)
-                ).call()
-                
-                if balance < int(amount):
-                    raise ValueError("Insufficient token balance")
+            if symbol != 'ETH' and state['balance'] < int(amount):
+                raise ValueError("Insufficient token balance")
             
             # Prepare transaction data
             tx_data = self.contract.encodeABI(
@@ -306,41 +733,258 @@ class Web3Service:
                 args=[symbol, int(amount)]
             )
             
-            return {
+            tx = {
                 'to': self.contract_address,
                 'data': tx_data,
                 'value': str(amount) if symbol == 'ETH' else '0',
                 'requiresApproval': symbol != 'ETH'
             }
+            tx.update(self._gas_fields('repay', symbol, user_address, tx))
+            return tx
         except Exception as e:
             current_app.logger.error(f"Error creating repay transaction: {str(e)}")
             raise
     
+    def create_batch_transactions(self, user_address, operations):
+        """
+        Prepare several operations for one user against a single on-chain snapshot.
+        `operations` is a list of {'type', 'symbol', 'amount'} applied in order. Every step is
+        checked the way the contract will check it (balances, interest-accrued debt, pool
+        liquidity and per-asset health), so the batch is rejected if any transaction would revert.
+        Returns the encoded transactions, total approvals per token and the resulting positions.
+        """
+        for i, operation in enumerate(operations):
+            if operation.get('type') not in BATCH_OPERATION_TYPES:
+                raise ValueError(f"Operation {i}: invalid transaction type")
+            self._validate_transaction_params(user_address, operation.get('symbol'), operation.get('amount'))
+        
+        lookups = {}
+        for operation in operations:
+            wanted = lookups.setdefault(operation['symbol'], {'position', 'config'})
+            if operation['type'] in ('deposit', 'repay') and operation['symbol'] != 'ETH':
+                wanted.add('balance')
+        
+        try:
+            # Positions, asset parameters and balances for every asset in one round trip
+            states = self._get_transaction_states(user_address, lookups)
+            simulated = {}
+            for symbol, state in states.items():
+                deposited, borrowed, interest_due = state['position']
+                simulated[symbol] = {
+                    'deposited': deposited,
+                    'borrowed': borrowed + interest_due,  # The contract accrues interest before every action
+                    'collateral_factor': state['config'][4],
+                    'available': state['details'][1] - state['details'][2],
+                    'balance': state.get('balance')
+                }
+            
+            transactions = []
+            approvals = {}
+            for i, operation in enumerate(operations):
+                tx_type, symbol, amount = operation['type'], operation['symbol'], int(operation['amount'])
+                error = self._apply_operation(simulated[symbol], tx_type, amount)
+                if error:
+                    raise ValueError(f"Operation {i} ({tx_type} {symbol}): {error}")
+                
+                tx = {
+                    'type': tx_type,
+                    'symbol': symbol,
+                    'amount': str(amount),
+                    'to': self.contract_address,
+                    'from': user_address,
+                    'data': self.contract.encodeABI(fn_name=tx_type, args=[symbol, amount]),
+                    'value': str(amount) if symbol == 'ETH' and tx_type in ('deposit', 'repay') else '0'
+                }
+                if tx_type in ('deposit', 'repay'):
+                    tx['requiresApproval'] = symbol != 'ETH'
+                    if symbol != 'ETH':
+                        approvals[symbol] = approvals.get(symbol, 0) + amount
+                # Later operations depend on earlier ones being mined, so only cached limits are used
+                tx.update(self._gas_fields(tx_type, symbol, user_address, tx, estimate=False))
+                transactions.append(tx)
+            
+            positions = {}
+            for symbol, position in simulated.items():
+                health_factor = None
+                if position['borrowed'] > 0:
+                    health_factor = (position['deposited'] * position['collateral_factor'] / 10000) / position['borrowed']
+                positions[symbol] = {
+                    'deposited': str(position['deposited']),
+                    'borrowed': str(position['borrowed']),
+                    'healthFactor': health_factor
+                }
+            health_factors = [p['healthFactor'] for p in positions.values() if p['healthFactor'] is not None]
+            
+            return {
+                'transactions': transactions,
+                'approvals': {symbol: str(total) for symbol, total in approvals.items()},
+                'positions': positions,
+                'healthFactor': min(health_factors) if health_factors else None
+            }
+        except Exception as e:
+            current_app.logger.error(f"Error creating batch transactions: {str(e)}")
+            raise
+    
+    @staticmethod
+    def _apply_operation(position, tx_type, amount):
+        """Apply one operation to a simulated position; returns the revert reason, or None if it succeeds"""
+        def is_healthy(deposited, borrowed):
+            return borrowed == 0 or borrowed <= (deposited * position['collateral_factor']) // 10000
+        
+        if tx_type == 'deposit':
+            if position['balance'] is not None:
+                if position['balance'] < amount:
+                    return "Insufficient token balance"
+                position['balance'] -= amount
+            position['deposited'] += amount
+            position['available'] += amount
+        elif tx_type == 'withdraw':
+            if position['deposited'] < amount:
+                return "Insufficient balance"
+            if not is_healthy(position['deposited'] - amount, position['borrowed']):
+                return "Withdrawal would cause unhealthy position"
+            position['deposited'] -= amount
+            position['available'] -= amount
+            if position['balance'] is not None:
+                position['balance'] += amount  # Withdrawn tokens can fund later deposits and repayments
+        elif tx_type == 'borrow':
+            if not is_healthy(position['deposited'], position['borrowed'] + amount):
+                return "Borrow would cause unhealthy position"
+            if position['available'] < amount:
+                return "Insufficient liquidity in pool"
+            position['borrowed'] += amount
+            position['available'] -= amount
+            if position['balance'] is not None:
+                position['balance'] += amount
+        elif tx_type == 'repay':
+            if position['borrowed'] == 0:
+                return "No outstanding borrow"
+            amount = min(amount, position['borrowed'])  # The contract caps repayment at the debt
+            if position['balance'] is not None:
+                if position['balance'] < amount:
+                    return "Insufficient token balance"
+                position['balance'] -= amount
+            position['borrowed'] -= amount
+            position['available'] += amount
+        return None
+    
     def get_transaction_receipt(self, tx_hash):
         """Get transaction receipt"""
         if not self._check_initialized():
             return None
         
         try:
-            return self.w3.eth.get_transaction_receipt(tx_hash)
+            return self._call(lambda: self.w3.eth.get_transaction_receipt(tx_hash))
         except Exception as e:
             current_app.logger.error(f"Error getting transaction receipt for {tx_hash}: {str(e)}")
             raise
     
-    def validate_address(self, address):
-        """Validate Ethereum address"""
-        if not self.w3:
-            self._initialize()
+    def get_transaction_receipts(self, tx_hashes):
+        """
+        Head block number and receipts of several transactions in one batched round trip.
+        Returns (block_number, {tx_hash: receipt}); pending or unknown transactions map to None
+        and receipts carry 'status' and 'blockNumber' as integers, plus their formatted 'logs'.
+        """
+        if not self._check_initialized():
+            return None, {}
         
+        tx_hashes = list(tx_hashes)
+        replies = self._batch_request(
+            [('eth_blockNumber', [])] + [('eth_getTransactionReceipt', [tx_hash]) for tx_hash in tx_hashes]
+        )
+        if not replies[0] or 'result' not in replies[0]:
+            raise ValueError(f"Could not read block number: {replies[0] and replies[0].get('error')}")
+        
+        receipts = {}
+        for tx_hash, reply in zip(tx_hashes, replies[1:]):
+            receipt = reply.get('result') if reply else None
+            receipts[tx_hash] = {
+                'status': int(receipt['status'], 16),
+                'blockNumber': int(receipt['blockNumber'], 16),
+                'blockHash': receipt['blockHash'],
+                'logs': [log_entry_formatter(log) for log in receipt.get('logs') or []]
+            } if receipt else None
+        return int(replies[0]['result'], 16), receipts
+    
+    def send_raw_transaction(self, raw_transaction):
+        """Broadcast a signed transaction, failing over to the next provider if one is unavailable"""
+        if not self._check_initialized():
+            return None
+        
+        try:
+            return self._call(lambda: self.w3.eth.send_raw_transaction(raw_transaction)).hex()
+        except ValueError as e:
+            # A provider that timed out may still have broadcast it before the failover
+            if 'already known' in _error_message(e).lower():
+                return Web3.keccak(hexstr=raw_transaction if isinstance(raw_transaction, str) else raw_transaction.hex()).hex()
+            raise
+    
+    def get_fee_history(self, block_count, percentiles):
+        """eth_feeHistory for the latest `block_count` blocks"""
+        if not self._check_initialized():
+            return None
+        return self._call(lambda: self.w3.eth.fee_history(block_count, 'latest', percentiles))
+    
+    def get_gas_price(self):
+        """Legacy gas price, for nodes without EIP-1559 fee history"""
+        if not self._check_initialized():
+            return None
+        return self._call(lambda: self.w3.eth.gas_price)
+    
+    def get_block_number(self, cached=False):
+        """Get the latest block number; with `cached`, reuse a value at most block_poll_interval old"""
+        if not self._check_initialized():
+            return None
+        
+        if cached:
+            return self._current_block_number()
+        return self._call(lambda: self.w3.eth.block_number)
+    
+    def get_block_headers(self, block_numbers):
+        """Get {'hash', 'timestamp'} for several blocks in one batched round trip, keyed by block number"""
+        if not self._check_initialized():
+            return {}
+        
+        block_numbers = list(block_numbers)
+        replies = self._batch_request([
+            ('eth_getBlockByNumber', [hex(number), False]) for number in block_numbers
+        ])
+        
+        headers = {}
+        for number, reply in zip(block_numbers, replies):
+            if not reply or not reply.get('result'):
+                raise ValueError(f"Block {number} not found")
+            block = reply['result']
+            headers[number] = {'hash': block['hash'], 'timestamp': int(block['timestamp'], 16)}
+        return headers
+    
+    def get_contract_logs(self, from_block, to_block, topics=None):
+        """Get raw logs emitted by the lending pool contract in an inclusive block range"""
+        if not self._check_initialized():
+            return []
+        
+        log_filter = {
+            'address': self.contract.address,
+            'fromBlock': from_block,
+            'toBlock': to_block
+        }
+        if topics:
+            log_filter['topics'] = topics
+        return self._call(lambda: self.w3.eth.get_logs(log_filter))
+    
+    def validate_address(self, address):
+        """Validate Ethereum address (no node connection required)"""
         try:
-            return self.w3.is_address(address)
+            return Web3.is_address(address)
         except:
             return False
     
     def _check_initialized(self):
-        """Check if Web3 and contract are initialized"""
+        """Check if Web3 and contract are initialized, connecting on first use"""
         if not self.w3 or not self.contract:
-            self._initialize()
+            with self._init_lock:
+                if not self.w3 or not self.contract:
+                    self._call(self._initialize)
             if not self.w3 or not self.contract:
                 return False
         return True
\ No newline at end of file
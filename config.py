@@ -14,7 +14,75 @@ class Config:
     
     # Blockchain configuration
     WEB3_PROVIDER_URI = os.environ.get('WEB3_PROVIDER_URI') or 'http://localhost:8545'
+    # Comma-separated node URLs; reads go to the fastest healthy one, failures fail over
+    WEB3_PROVIDER_URIS = [uri.strip() for uri in (os.environ.get('WEB3_PROVIDER_URIS') or WEB3_PROVIDER_URI).split(',') if uri.strip()]
     CONTRACT_ADDRESS = os.environ.get('CONTRACT_ADDRESS')
+    WEB3_POOL_SIZE = int(os.environ.get('WEB3_POOL_SIZE') or 20)  # Keep-alive connections per worker
+    WEB3_REQUEST_TIMEOUT = int(os.environ.get('WEB3_REQUEST_TIMEOUT') or 10)  # Seconds
+    
+    # View call cache configuration
+    WEB3_CACHE_BACKEND = os.environ.get('WEB3_CACHE_BACKEND') or 'memory'  # memory, redis or none
+    WEB3_CACHE_TTL = float(os.environ.get('WEB3_CACHE_TTL') or 12)  # Seconds, upper bound even without new blocks
+    WEB3_CACHE_MAX_ENTRIES = int(os.environ.get('WEB3_CACHE_MAX_ENTRIES') or 1024)
+    WEB3_CACHE_STALE_TTL = float(os.environ.get('WEB3_CACHE_STALE_TTL') or 300)  # Seconds stale results may be served while the node is down
+    WEB3_BLOCK_POLL_INTERVAL = float(os.environ.get('WEB3_BLOCK_POLL_INTERVAL') or 1)  # Seconds between block number checks
+    
+    # RPC retry and circuit breaker configuration
+    WEB3_RETRY_ATTEMPTS = int(os.environ.get('WEB3_RETRY_ATTEMPTS') or 3)
+    WEB3_RETRY_BASE_DELAY = float(os.environ.get('WEB3_RETRY_BASE_DELAY') or 0.1)  # Seconds, doubled per attempt with full jitter
+    WEB3_RETRY_MAX_DELAY = float(os.environ.get('WEB3_RETRY_MAX_DELAY') or 1)  # Seconds
+    WEB3_RETRY_DEADLINE = float(os.environ.get('WEB3_RETRY_DEADLINE') or 3)  # Seconds across all attempts of one call
+    WEB3_BREAKER_THRESHOLD = int(os.environ.get('WEB3_BREAKER_THRESHOLD') or 5)  # Consecutive failures that open the breaker
+    WEB3_BREAKER_RESET = float(os.environ.get('WEB3_BREAKER_RESET') or 30)  # Seconds before a trial call is allowed
+    REDIS_URL = os.environ.get('REDIS_URL') or 'redis://localhost:6379/0'
+    
+    # API response cache configuration
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND') or 'redis'  # redis (falls back to memory), memory or none
+    RESPONSE_CACHE_TTL = float(os.environ.get('RESPONSE_CACHE_TTL') or 300)  # Seconds; entries are also versioned by block
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES') or 256)
+    
+    # Server-sent event stream configuration
+    STREAM_POLL_INTERVAL = float(os.environ.get('STREAM_POLL_INTERVAL') or 1)  # Seconds between head block checks
+    STREAM_KEEPALIVE = float(os.environ.get('STREAM_KEEPALIVE') or 15)  # Seconds between keepalive comments
+    STREAM_QUEUE_SIZE = int(os.environ.get('STREAM_QUEUE_SIZE') or 16)  # Undelivered events kept per client
+    
+    # Transaction recording configuration
+    RECEIPT_CONFIRMATIONS = int(os.environ.get('RECEIPT_CONFIRMATIONS') or 2)  # Blocks including the transaction's own before it is recorded
+    RECEIPT_POLL_INTERVAL = float(os.environ.get('RECEIPT_POLL_INTERVAL') or 2)  # Seconds between receipt polls
+    RECEIPT_BATCH_SIZE = int(os.environ.get('RECEIPT_BATCH_SIZE') or 100)  # Receipts fetched per batched RPC
+    RECEIPT_PENDING_TIMEOUT = int(os.environ.get('RECEIPT_PENDING_TIMEOUT') or 3600)  # Seconds before an unmined transaction is dropped
+    MAX_RECORD_BATCH = int(os.environ.get('MAX_RECORD_BATCH') or 500)  # Records per /transactions/record request
+    
+    # Metric time series configuration
+    TIMESERIES_SAMPLE_INTERVAL = float(os.environ.get('TIMESERIES_SAMPLE_INTERVAL') or 300)  # Seconds between on-chain market samples
+    TIMESERIES_MAX_POINTS = int(os.environ.get('TIMESERIES_MAX_POINTS') or 1000)  # Buckets per /timeseries page
+    TIMESERIES_HOURLY_MAX_DAYS = int(os.environ.get('TIMESERIES_HOURLY_MAX_DAYS') or 14)  # Longer ranges default to daily buckets
+    
+    # Gas and fee suggestions for prepared transactions
+    GAS_ESTIMATE_TTL = float(os.environ.get('GAS_ESTIMATE_TTL') or 300)  # Seconds a (function, asset) gas limit is reused
+    GAS_LIMIT_MULTIPLIER = float(os.environ.get('GAS_LIMIT_MULTIPLIER') or 1.2)  # Safety margin on node estimates
+    GAS_ESTIMATE_FAILURE_TTL = float(os.environ.get('GAS_ESTIMATE_FAILURE_TTL') or 15)  # Seconds before a failed estimate is retried; gas is left to the wallet meanwhile
+    FEE_POLL_INTERVAL = float(os.environ.get('FEE_POLL_INTERVAL') or 12)  # Seconds between eth_feeHistory polls
+    
+    # Event indexer configuration
+    INDEXER_START_BLOCK = int(os.environ.get('INDEXER_START_BLOCK') or 0)  # Contract deployment block
+    INDEXER_CHUNK_SIZE = int(os.environ.get('INDEXER_CHUNK_SIZE') or 2000)  # Blocks per eth_getLogs request
+    INDEXER_CONFIRMATIONS = int(os.environ.get('INDEXER_CONFIRMATIONS') or 2)  # Blocks to stay behind the head
+    INDEXER_REORG_DEPTH = int(os.environ.get('INDEXER_REORG_DEPTH') or 12)  # Blocks to rewind when a reorg is detected
+    INDEXER_POLL_INTERVAL = float(os.environ.get('INDEXER_POLL_INTERVAL') or 5)  # Seconds between syncs
+    USER_POSITIONS_SOURCE = os.environ.get('USER_POSITIONS_SOURCE') or 'index'  # index (falls back to chain) or chain
+    ASSET_REGISTRY_REFRESH = float(os.environ.get('ASSET_REGISTRY_REFRESH') or 60)  # Seconds between background reloads of the in-memory asset registry
+    MAX_BATCH_OPERATIONS = int(os.environ.get('MAX_BATCH_OPERATIONS') or 20)  # Operations per /transactions/batch request
+    MAX_HISTORY_PAGE_SIZE = int(os.environ.get('MAX_HISTORY_PAGE_SIZE') or 500)  # Rows per /users/<address>/transactions page
     
     # API Keys
-    COINDESK_API_KEY = os.environ.get('COINDESK_API_KEY')
\ No newline at end of file
+    COINDESK_API_KEY = os.environ.get('COINDESK_API_KEY')
+    COINGECKO_API_KEY = os.environ.get('COINGECKO_API_KEY')
+    
+    # Price history API configuration
+    COINGECKO_BASE_URL = os.environ.get('COINGECKO_BASE_URL') or 'https://api.coingecko.com/api/v3'
+    COINGECKO_TIMEOUT = float(os.environ.get('COINGECKO_TIMEOUT') or 10)  # Seconds per request
+    COINGECKO_MAX_CONCURRENCY = int(os.environ.get('COINGECKO_MAX_CONCURRENCY') or 4)  # Parallel fetches
+    COINGECKO_MAX_RETRIES = int(os.environ.get('COINGECKO_MAX_RETRIES') or 4)
+    COINGECKO_BACKOFF_BASE = float(os.environ.get('COINGECKO_BACKOFF_BASE') or 1)  # Seconds
+    PRICE_HISTORY_DAYS = int(os.environ.get('PRICE_HISTORY_DAYS') or 365)  # Backfill window for new coins
\ No newline at end of file
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Background job that confirms transactions queued by /api/transactions/record
+Run exactly one instance; use --once from cron, or run without it as a long-running worker
+"""
+
+import os
+import sys
+import argparse
+import logging
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.services.receipt_queue import ReceiptConfirmer
+from app.services.web3_service import Web3Service
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('receipt_confirmer.log'),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger('receipt_confirmer')
+
+def confirm_transactions(once=False):
+    """Confirm queued transactions, once or continuously"""
+    logger.info("Starting receipt confirmer")
+    
+    app = create_app()
+    with app.app_context():
+        confirmer = ReceiptConfirmer.from_config(Web3Service(), app.config)
+        
+        if not once:
+            confirmer.run_forever(poll_interval=app.config['RECEIPT_POLL_INTERVAL'])
+        
+        try:
+            while confirmer.tick():
+                pass
+            logger.info("Processed queued transactions")
+            return True
+        except Exception as e:
+            logger.error(f"Error confirming transactions: {str(e)}")
+            return False
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--once', action='store_true', help='Process the queue once and exit')
+    args = parser.parse_args()
+    confirm_transactions(once=args.once)
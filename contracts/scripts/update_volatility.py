@@ -50,10 +50,11 @@ def update_volatility_and_rates():
                 # Get all active assets
                 assets = Asset.query.filter_by(is_active=True).all()
                 
+                # Get latest volatility record of every asset in one query
+                latest_records = VolatilityRecord.latest_for_assets([asset.id for asset in assets])
+                
                 for asset in assets:
-                    # Get latest volatility record
-                    latest_record = VolatilityRecord.query.filter_by(asset_id=asset.id).order_by(
-                        VolatilityRecord.timestamp.desc()).first()
+                    latest_record = latest_records.get(asset.id)
                     
                     if latest_record:
                         try:
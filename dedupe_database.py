@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+One-off migration that removes duplicate rows blocking the unique indexes on
+transactions.tx_hash and positions (user_id, asset_id), then creates the indexes.
+Every deleted row is logged; run with --dry-run first to review them.
+"""
+
+import os
+import sys
+import argparse
+import logging
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db
+from app.models.migrations import remove_duplicates
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('dedupe_database.log'),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger('dedupe_database')
+
+def dedupe_database(dry_run=False):
+    """Remove duplicate rows and create the unique indexes they were blocking"""
+    app = create_app(check_schema=False)
+    with app.app_context():
+        try:
+            removed = remove_duplicates(db.engine, db.metadata, dry_run=dry_run)
+            for index_name, count in removed.items():
+                logger.info(f"{index_name}: {count} duplicate rows {'found' if dry_run else 'deleted'}")
+            return True
+        except Exception as e:
+            logger.error(f"Error removing duplicates: {str(e)}")
+            return False
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--dry-run', action='store_true', help='Log the rows that would be deleted without changing anything')
+    args = parser.parse_args()
+    dedupe_database(dry_run=args.dry_run)
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Background job that indexes DynamicLendingPool events into the database
+Run with --once from cron, or without it as a long-running worker
+"""
+
+import os
+import sys
+import argparse
+import logging
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.services.event_indexer import EventIndexer
+from app.services.web3_service import Web3Service
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('event_indexer.log'),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger('event_indexer')
+
+def index_events(once=False):
+    """Sync contract events into the database, once or continuously"""
+    logger.info("Starting event indexer")
+    
+    app = create_app()
+    with app.app_context():
+        indexer = EventIndexer.from_config(Web3Service(), app.config)
+        
+        if not once:
+            indexer.run_forever(poll_interval=app.config['INDEXER_POLL_INTERVAL'])
+        
+        try:
+            indexed = indexer.sync()
+            logger.info(f"Indexed {indexed} events")
+            return True
+        except Exception as e:
+            logger.error(f"Error indexing events: {str(e)}")
+            return False
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--once', action='store_true', help='Index up to the current head and exit')
+    args = parser.parse_args()
+    index_events(once=args.once)
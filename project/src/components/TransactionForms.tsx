@@ -117,21 +117,23 @@ const TransactionForms: React.FC<TransactionFormsProps> = ({
         }
       }
 
-      // Send transaction with proper gas estimation
-      let gasLimit;
-      try {
-        gasLimit = await signer.estimateGas({
-          to: txData.to,
-          data: txData.data,
-          value: txData.value || "0",
-        });
-        // Add 20% buffer to gas limit
-        gasLimit = (gasLimit * BigInt(120)) / BigInt(100);
-      } catch (error) {
-        console.error("Gas estimation failed:", error);
-        throw new Error(
-          "Transaction would fail - check your balance and allowance"
-        );
+      // Use the gas limit prepared by the backend, estimating locally only if it has none
+      let gasLimit = txData.gas ? BigInt(txData.gas) : undefined;
+      if (gasLimit === undefined) {
+        try {
+          gasLimit = await signer.estimateGas({
+            to: txData.to,
+            data: txData.data,
+            value: txData.value || "0",
+          });
+          // Add 20% buffer to gas limit
+          gasLimit = (gasLimit * BigInt(120)) / BigInt(100);
+        } catch (error) {
+          console.error("Gas estimation failed:", error);
+          throw new Error(
+            "Transaction would fail - check your balance and allowance"
+          );
+        }
       }
 
       const tx = await signer.sendTransaction({
@@ -139,6 +141,9 @@ const TransactionForms: React.FC<TransactionFormsProps> = ({
         data: txData.data,
         value: txData.value || "0",
         gasLimit,
+        maxFeePerGas: txData.maxFeePerGas,
+        maxPriorityFeePerGas: txData.maxPriorityFeePerGas,
+        gasPrice: txData.gasPrice,
       });
 
       await toast.promise(tx.wait(), {
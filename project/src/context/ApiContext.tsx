@@ -19,6 +19,7 @@ export const ApiProvider: React.FC<{ children: React.ReactNode }> = ({ children
   const [loadingAssets, setLoadingAssets] = useState(false);
   const [loadingUserData, setLoadingUserData] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  const [streamAddress, setStreamAddress] = useState<string | null>(null);
 
   const refreshAssets = async () => {
     setLoadingAssets(true);
@@ -36,6 +37,7 @@ export const ApiProvider: React.FC<{ children: React.ReactNode }> = ({ children
 
   const refreshUserData = async (address: string) => {
     if (!address) return;
+    setStreamAddress(address.toLowerCase());
     setLoadingUserData(true);
     setError(null);
     try {
@@ -53,6 +55,30 @@ export const ApiProvider: React.FC<{ children: React.ReactNode }> = ({ children
     refreshAssets();
   }, []);
 
+  // Keep assets and the connected user's positions current without polling
+  useEffect(() => {
+    const stream = apiService.openStream(streamAddress ?? undefined);
+    const parse = (event: MessageEvent) => {
+      try {
+        return JSON.parse(event.data);
+      } catch (err) {
+        console.error('Invalid stream event', err);
+        return null;
+      }
+    };
+
+    stream.addEventListener('assets', (event) => {
+      const data = parse(event as MessageEvent);
+      if (data) setAssets(data);
+    });
+    stream.addEventListener('positions', (event) => {
+      const data = parse(event as MessageEvent);
+      if (data) setUserData(data);
+    });
+
+    return () => stream.close();
+  }, [streamAddress]);
+
   return (
     <ApiContext.Provider
       value={{
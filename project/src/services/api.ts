@@ -37,6 +37,10 @@ export interface TransactionData {
   to: string;
   data: string;
   value?: string;
+  gas?: number | null;
+  maxFeePerGas?: string;
+  maxPriorityFeePerGas?: string;
+  gasPrice?: string;
 }
 
 export const apiService = {
@@ -46,6 +50,10 @@ export const apiService = {
   
   // User related endpoints
   getUserData: (address: string) => api.get<UserData>(`/users/${address}`),
+
+  // Recorded transactions, newest first; pass nextCursor back as cursor for the following page
+  getUserTransactions: (address: string, params: { asset?: string; type?: string; limit?: number; cursor?: string } = {}) =>
+    api.get(`/users/${address}/transactions`, { params }),
   
   // Transaction related endpoints
   prepareDeposit: (address: string, symbol: string, amount: string) => 
@@ -62,10 +70,22 @@ export const apiService = {
     
   recordTransaction: (txHash: string, txType: string, address: string, symbol: string, amount: string) =>
     api.post('/transactions/record', { txHash, txType, address, symbol, amount }),
+
+  // Confirmation status of a recorded transaction: pending, mined, confirmed, failed or dropped
+  getRecordedTransaction: (txHash: string) =>
+    api.get(`/transactions/record/${txHash}`),
     
   // Volatility related endpoints
   getVolatilityHistory: (symbol: string) => 
     api.get(`/volatility/${symbol}`),
+
+  // Bucketed metric history; pass nextCursor back as cursor for the following page
+  getTimeSeries: (symbol: string, params: { metrics?: string; from?: string; to?: string; resolution?: string; cursor?: string } = {}) =>
+    api.get(`/timeseries/${symbol}`, { params }),
+
+  // Server-sent asset and position updates, pushed once per block when they change
+  openStream: (address?: string) =>
+    new EventSource(`${API_BASE_URL}/stream${address ? `?address=${address}` : ''}`),
 };
 
 export default apiService;
\ No newline at end of file
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Background job that samples asset utilization and prices into the metric rollups
+Run with --once from cron, or without it as a long-running worker
+"""
+
+import os
+import sys
+import time
+import argparse
+import logging
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.services.timeseries import TimeSeriesService
+from app.services.web3_service import Web3Service
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('market_sampler.log'),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger('market_sampler')
+
+def sample_markets(once=False, backfill=False):
+    """Record market samples, once or every TIMESERIES_SAMPLE_INTERVAL seconds"""
+    logger.info("Starting market sampler")
+    
+    app = create_app()
+    with app.app_context():
+        service = TimeSeriesService(Web3Service())
+        
+        if backfill:
+            try:
+                logger.info(f"Backfilled {service.backfill()} rollup buckets")
+            except Exception as e:
+                logger.error(f"Error backfilling rollups: {str(e)}")
+                return False
+        
+        while True:
+            try:
+                written = service.sample_market()
+                logger.info(f"Updated {written} rollup buckets")
+            except Exception as e:
+                logger.error(f"Error sampling markets: {str(e)}")
+                if once:
+                    return False
+            if once:
+                return True
+            time.sleep(app.config['TIMESERIES_SAMPLE_INTERVAL'])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--once', action='store_true', help='Take one sample and exit')
+    parser.add_argument('--backfill', action='store_true', help='Build rollups from existing volatility and price history first')
+    args = parser.parse_args()
+    sample_markets(once=args.once, backfill=args.backfill)
@@ -0,0 +1,177 @@
+import os
+import sys
+
+import pytest
+from eth_abi import decode, encode
+from eth_utils import event_abi_to_log_topic, function_abi_to_4byte_selector
+from web3 import Web3
+from web3._utils.abi import get_abi_input_types, get_abi_output_types
+from web3.providers.base import BaseProvider
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db
+from app.models.models import Asset
+from app.services.asset_registry import refresh_asset_registry
+from app.api import response_cache
+from app.services import web3_service as web3_service_module
+from app.services.web3_service import Web3Service, find_contract_abi, _load_contract_abi
+from config import Config
+
+CONTRACT_ADDRESS = '0x5FbDB2315678afecb367f032d93F642f64180aa3'
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    CONTRACT_ADDRESS = CONTRACT_ADDRESS
+    WEB3_CACHE_BACKEND = 'memory'
+    RESPONSE_CACHE_BACKEND = 'memory'
+
+class FakeNode(BaseProvider):
+    """
+    In-process JSON-RPC node serving the lending pool's view calls, logs and block headers.
+    View functions are answered by `views[fn_name](args, block)`; raising makes the call revert.
+    """
+
+    def __init__(self, abi):
+        super().__init__()
+        self.abi = abi
+        self.block_number = 100
+        self.reorged_from = None
+        self.logs = []
+        self.views = {}
+        self.batch_support = True
+        self.requests = []
+        self.calls = []
+        self.log_ranges = []
+        self._functions = {
+            '0x' + function_abi_to_4byte_selector(item).hex(): item
+            for item in abi if item.get('type') == 'function'
+        }
+
+    def is_connected(self, show_traceback=False):
+        return True
+
+    def make_request(self, method, params):
+        return self._handle({'jsonrpc': '2.0', 'id': 0, 'method': method, 'params': params})
+
+    def make_batch_request(self, payload):
+        if not self.batch_support:
+            return {'jsonrpc': '2.0', 'id': None, 'error': {'code': -32600, 'message': 'batch requests not supported'}}
+        return [self._handle(request) for request in payload]
+
+    def block_hash(self, number):
+        fork = 1 if self.reorged_from is not None and number >= self.reorged_from else 0
+        return '0x' + '%062x%02x' % (number, fork)
+
+    def log(self, name, block, index, tx_hash, **args):
+        """Add an encoded pool event log at `block`"""
+        abi = next(item for item in self.abi if item.get('type') == 'event' and item['name'] == name)
+        topics = ['0x' + event_abi_to_log_topic(abi).hex()]
+        types, values = [], []
+        for arg in abi['inputs']:
+            if arg['indexed']:
+                topics.append('0x' + encode([arg['type']], [args[arg['name']]]).hex())
+            else:
+                types.append(arg['type'])
+                values.append(args[arg['name']])
+        self.logs.append({
+            'address': CONTRACT_ADDRESS,
+            'blockNumber': hex(block),
+            'blockHash': self.block_hash(block),
+            'transactionHash': tx_hash,
+            'transactionIndex': '0x0',
+            'logIndex': hex(index),
+            'removed': False,
+            'topics': topics,
+            'data': '0x' + encode(types, values).hex()
+        })
+
+    def _handle(self, request):
+        method, params = request['method'], request['params']
+        self.requests.append(method)
+        reply = {'jsonrpc': '2.0', 'id': request['id']}
+        if method == 'eth_call':
+            try:
+                reply['result'] = self._eth_call(params[0], params[1] if len(params) > 1 else 'latest')
+            except Exception as e:
+                reply['error'] = {'code': 3, 'message': f'execution reverted: {e}'}
+        elif method == 'eth_chainId':
+            reply['result'] = '0x539'
+        elif method == 'eth_blockNumber':
+            reply['result'] = hex(self.block_number)
+        elif method == 'eth_getBlockByNumber':
+            number = self.block_number if params[0] == 'latest' else int(params[0], 16)
+            reply['result'] = {
+                'number': hex(number),
+                'hash': self.block_hash(number),
+                'parentHash': self.block_hash(number - 1),
+                'timestamp': hex(1700000000 + number * 12),
+                'transactions': []
+            }
+        elif method == 'eth_getLogs':
+            low, high = (int(params[0][key], 16) for key in ('fromBlock', 'toBlock'))
+            self.log_ranges.append((low, high))
+            reply['result'] = [log for log in self.logs if low <= int(log['blockNumber'], 16) <= high]
+        else:
+            reply['error'] = {'code': -32601, 'message': f'method not found: {method}'}
+        return reply
+
+    def _eth_call(self, transaction, block):
+        function = self._functions[transaction['data'][:10]]
+        args = decode(get_abi_input_types(function), bytes.fromhex(transaction['data'][10:]))
+        block = int(block, 16) if block.startswith('0x') else block
+        self.calls.append((function['name'], args, block))
+        value = self.views[function['name']](args, block)
+        output_types = get_abi_output_types(function)
+        return '0x' + encode(output_types, list(value) if len(output_types) > 1 else [value]).hex()
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def assets(app):
+    for symbol in ('ETH', 'DAI'):
+        db.session.add(Asset(
+            symbol=symbol,
+            name=symbol,
+            token_address='0x' + symbol.encode().hex().ljust(40, '0'),
+            price_feed_address='0x' + '0' * 40,
+            base_interest_rate=200,
+            volatility_multiplier=100,
+            collateral_factor=7500
+        ))
+    db.session.commit()
+    refresh_asset_registry()
+    return {asset.symbol: asset for asset in Asset.query.all()}
+
+@pytest.fixture
+def node():
+    return FakeNode(_load_contract_abi(os.path.abspath(find_contract_abi())))
+
+@pytest.fixture
+def web3_service(app, node):
+    """Web3Service wired to the fake node instead of an HTTP provider pool"""
+    service = Web3Service(contract_address=CONTRACT_ADDRESS)
+    w3 = Web3(node)
+    service.contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=node.abi)
+    service.w3 = w3
+    service._pool = node
+    return service
+
+@pytest.fixture
+def shared_web3_service(web3_service, monkeypatch):
+    """Serve API requests from the fake node, with a fresh response cache"""
+    monkeypatch.setattr(web3_service_module, '_shared_service', web3_service)
+    monkeypatch.setattr(web3_service_module, '_shared_service_pid', os.getpid())
+    monkeypatch.setattr(response_cache, '_response_cache_pid', None)
+    return web3_service
@@ -0,0 +1,32 @@
+from datetime import datetime
+
+from app import db
+from app.models.models import VolatilityRecord
+from app.services.asset_registry import get_asset_registry, refresh_asset_registry
+
+def test_registry_carries_the_latest_volatility(assets):
+    eth, dai = assets['ETH'].id, assets['DAI'].id
+    db.session.add_all([
+        VolatilityRecord(asset_id=eth, volatility=0.1, effective_interest_rate=100, timestamp=datetime(2024, 1, 1)),
+        VolatilityRecord(asset_id=eth, volatility=0.2, effective_interest_rate=200, timestamp=datetime(2024, 1, 2)),
+        VolatilityRecord(asset_id=eth, volatility=0.3, effective_interest_rate=300, timestamp=datetime(2024, 1, 2)),
+    ])
+    db.session.commit()
+
+    registry = refresh_asset_registry()
+
+    assert [(asset.symbol, asset.volatility) for asset in registry.active] == [('ETH', 0.3), ('DAI', None)]
+    assert {asset_id: record.volatility for asset_id, record in VolatilityRecord.latest_for_assets().items()} == {eth: 0.3}
+    assert VolatilityRecord.latest_for_assets([dai]) == {}
+
+def test_readers_keep_the_snapshot_until_it_is_refreshed(assets):
+    registry = get_asset_registry()
+    assets['DAI'].is_active = False
+    db.session.commit()
+
+    assert get_asset_registry() is registry
+    assert get_asset_registry().get('DAI') is not None
+
+    refresh_asset_registry()
+    assert get_asset_registry().get('DAI') is None
+    assert get_asset_registry().get('DAI', active_only=False).symbol == 'DAI'
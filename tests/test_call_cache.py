@@ -0,0 +1,76 @@
+from app.services import call_cache
+from app.services.call_cache import CallCache, LRUCacheBackend
+
+class FailingBackend:
+    name = 'failing'
+
+    def get(self, key):
+        raise ConnectionError('cache down')
+
+    def set(self, key, value, ttl):
+        raise ConnectionError('cache down')
+
+def test_entries_are_keyed_by_block():
+    cache = CallCache(LRUCacheBackend())
+    cache.set('getAssetPrice', ('ETH',), 10, 2000)
+
+    assert cache.get('getAssetPrice', ('ETH',), 10) == (True, 2000)
+    assert cache.get('getAssetPrice', ('ETH',), 11) == (False, None)
+    assert cache.get('getAssetPrice', ('DAI',), 10) == (False, None)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+def test_entries_expire_after_ttl_within_a_block(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(call_cache.time, 'monotonic', lambda: now[0])
+    cache = CallCache(LRUCacheBackend(), ttl=12)
+    cache.set('getAssetPrice', ('ETH',), 10, 2000)
+
+    now[0] += 11
+    assert cache.get('getAssetPrice', ('ETH',), 10) == (True, 2000)
+    now[0] += 2
+    assert cache.get('getAssetPrice', ('ETH',), 10) == (False, None)
+
+def test_stale_value_outlives_its_block():
+    cache = CallCache(LRUCacheBackend(), stale_ttl=300)
+    cache.set('getAssetPrice', ('ETH',), 10, 2000)
+    cache.set('getAssetPrice', ('ETH',), 11, 2100)
+
+    assert cache.get_stale('getAssetPrice', ('ETH',)) == (True, 2100)
+    assert cache.stale_hits == 1
+
+def test_stale_values_are_off_by_default():
+    cache = CallCache(LRUCacheBackend())
+    cache.set('getAssetPrice', ('ETH',), 10, 2000)
+
+    assert cache.get_stale('getAssetPrice', ('ETH',)) == (False, None)
+
+def test_lru_evicts_the_least_recently_used_entry():
+    cache = CallCache(LRUCacheBackend(max_entries=2))
+    cache.set('getAssetPrice', ('ETH',), 10, 1)
+    cache.set('getAssetPrice', ('DAI',), 10, 2)
+    cache.get('getAssetPrice', ('ETH',), 10)
+    cache.set('getAssetPrice', ('BTC',), 10, 3)
+
+    assert cache.get('getAssetPrice', ('ETH',), 10) == (True, 1)
+    assert cache.get('getAssetPrice', ('DAI',), 10) == (False, None)
+
+def test_backend_failures_are_misses(app):
+    cache = CallCache(FailingBackend(), stale_ttl=300)
+    cache.set('getAssetPrice', ('ETH',), 10, 2000)
+
+    assert cache.get('getAssetPrice', ('ETH',), 10) == (False, None)
+    assert cache.get_stale('getAssetPrice', ('ETH',)) == (False, None)
+    assert cache.errors == 3
+
+def test_service_reuses_calls_until_the_block_changes(web3_service, node):
+    web3_service.cache = CallCache(LRUCacheBackend())
+    web3_service.block_poll_interval = 0
+    node.views['getAssetPrice'] = lambda args, block: 200000000000
+
+    assert web3_service.get_asset_price('ETH') == 200000000000
+    assert web3_service.get_asset_price('ETH') == 200000000000
+    assert len(node.calls) == 1
+
+    node.block_number += 1
+    web3_service.get_asset_price('ETH')
+    assert len(node.calls) == 2
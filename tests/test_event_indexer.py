@@ -0,0 +1,113 @@
+from decimal import Decimal
+
+import pytest
+from web3 import Web3
+
+from app import db
+from app.models.models import Asset, Position, Transaction
+from app.services.event_indexer import EventIndexer
+
+USER = '0x' + 'aa' * 20
+OTHER_USER = '0x' + 'bb' * 20
+TOKEN = '0x' + '11' * 20
+
+def tx_hash(n):
+    return '0x' + '%064x' % n
+
+@pytest.fixture
+def chain(node):
+    """Pool storage as the fake node reports it; positions per (address, symbol)"""
+    state = {'positions': {}, 'base_interest_rate': 200}
+    node.views['userPositions'] = lambda args, block: state['positions'].get((args[0].lower(), args[1]), (0, 0, 0, 0))
+    node.views['assets'] = lambda args, block: (TOKEN, TOKEN, 18, state['base_interest_rate'], 7500, 250, 0, 0, True)
+    return state
+
+@pytest.fixture
+def indexer(web3_service, assets, chain):
+    return EventIndexer(web3_service, start_block=0, chunk_size=40, confirmations=2, reorg_depth=5)
+
+def position_reads(node):
+    return [block for name, _, block in node.calls if name == 'userPositions']
+
+def test_sync_indexes_confirmed_blocks_in_chunks(indexer, node, chain):
+    node.log('Deposit', 10, 0, tx_hash(1), user=Web3.to_checksum_address(USER), symbol='ETH', amount=10**18)
+    node.log('Borrow', 45, 0, tx_hash(2), user=Web3.to_checksum_address(USER), symbol='ETH', amount=5 * 10**17)
+    node.log('Deposit', 90, 0, tx_hash(3), user=Web3.to_checksum_address(OTHER_USER), symbol='DAI', amount=5 * 10**18)
+    chain['positions'][(USER, 'ETH')] = (10**18, 5 * 10**17, 1700000120, 0)
+
+    assert indexer.sync() == 3
+
+    assert node.log_ranges == [(0, 39), (40, 79), (80, 98)]
+    # Positions touched by a chunk are read at the chunk's last block
+    assert position_reads(node) == [39, 79, 98]
+    checkpoint = indexer._get_checkpoint()
+    assert (checkpoint.block_number, checkpoint.block_hash) == (98, node.block_hash(98))
+
+    transactions = Transaction.query.order_by(Transaction.block_number).all()
+    assert [(t.tx_type, t.amount, t.block_number) for t in transactions] == [
+        ('deposit', Decimal(1), 10), ('borrow', Decimal('0.5'), 45), ('deposit', Decimal(5), 90)
+    ]
+    position = Position.query.filter_by(asset_id=Asset.query.filter_by(symbol='ETH').one().id).one()
+    assert (position.deposited_amount, position.borrowed_amount) == (Decimal(1), Decimal('0.5'))
+
+def test_sync_is_idempotent_and_bounded(indexer, node):
+    node.log('Deposit', 10, 0, tx_hash(1), user=Web3.to_checksum_address(USER), symbol='ETH', amount=1)
+
+    assert indexer.sync(max_chunks=1) == 1
+    assert node.log_ranges == [(0, 39)]
+    assert indexer.sync() == 0
+    assert indexer.sync() == 0
+    assert node.log_ranges == [(0, 39), (40, 79), (80, 98)]
+    assert Transaction.query.count() == 1
+
+def test_failed_position_read_does_not_advance_the_checkpoint(indexer, node):
+    node.log('Deposit', 10, 0, tx_hash(1), user=Web3.to_checksum_address(USER), symbol='ETH', amount=1)
+    node.views['userPositions'] = lambda args, block: 1 / 0
+
+    with pytest.raises(ValueError):
+        indexer.sync()
+
+    assert indexer._get_checkpoint().block_number == -1
+    assert Transaction.query.count() == 0
+
+def test_reorg_drops_orphaned_rows_and_rereads_state(indexer, node, chain):
+    node.log('Deposit', 10, 0, tx_hash(1), user=Web3.to_checksum_address(USER), symbol='ETH', amount=10**18)
+    node.log('AssetUpdated', 96, 0, tx_hash(2), symbol='ETH', baseInterestRate=900, collateralFactor=5000)
+    node.log('Deposit', 97, 0, tx_hash(3), user=Web3.to_checksum_address(OTHER_USER), symbol='DAI', amount=10**18)
+    chain['positions'][(OTHER_USER, 'DAI')] = (10**18, 0, 1700000000, 0)
+    indexer.sync()
+    assert Asset.query.filter_by(symbol='ETH').one().base_interest_rate == 900
+
+    # Blocks from 95 are replaced by a fork that has neither event
+    node.reorged_from = 95
+    node.block_number = 103
+    node.logs = node.logs[:1]
+    chain['positions'][(OTHER_USER, 'DAI')] = (0, 0, 0, 0)
+    node.calls.clear()
+    node.log_ranges.clear()
+
+    assert indexer.sync() == 0
+
+    # Rewound reorg_depth blocks behind the old checkpoint, then re-indexed up to the new head
+    assert node.log_ranges == [(94, 101)]
+    assert position_reads(node) == [93]
+    assert [block for name, _, block in node.calls if name == 'assets'] == [93, 93]
+    assert [t.tx_hash for t in Transaction.query.all()] == [tx_hash(1)]
+    assert Asset.query.filter_by(symbol='ETH').one().base_interest_rate == 200
+    position = Position.query.filter_by(asset_id=Asset.query.filter_by(symbol='DAI').one().id).one()
+    assert position.deposited_amount == 0
+    checkpoint = indexer._get_checkpoint()
+    assert (checkpoint.block_number, checkpoint.block_hash) == (101, node.block_hash(101))
+
+def test_no_reorg_when_the_checkpoint_block_is_unchanged(indexer, node):
+    node.log('Deposit', 10, 0, tx_hash(1), user=Web3.to_checksum_address(USER), symbol='ETH', amount=1)
+    indexer.sync()
+    node.reorged_from = 99
+    node.block_number = 110
+
+    indexer.sync()
+
+    assert node.log_ranges[-1] == (99, 108)
+    assert Transaction.query.count() == 1
+    db.session.expire_all()
+    assert indexer._get_checkpoint().block_number == 108
@@ -0,0 +1,69 @@
+from datetime import datetime
+from decimal import Decimal
+
+from app import db
+from app.models.models import Transaction, User
+from app.services import ingestion
+from app.services.ingestion import insert_ignoring_conflicts, insert_transactions, upsert_users
+
+def transaction(assets, tx_hash, address='0x' + 'aa' * 20, block_number=1):
+    return {
+        'address': address,
+        'asset_id': assets['ETH'].id,
+        'tx_type': 'deposit',
+        'amount': Decimal(1),
+        'interest_amount': Decimal(0),
+        'tx_hash': tx_hash,
+        'block_number': block_number,
+        'timestamp': datetime(2024, 1, 1)
+    }
+
+def test_conflicting_rows_are_skipped(app):
+    db.session.add(User(address='0x1'))
+    db.session.commit()
+
+    insert_ignoring_conflicts(User, [{'address': '0x1'}, {'address': '0x2'}, {'address': '0x2'}], ['address'])
+    db.session.commit()
+
+    assert sorted(address for address, in db.session.query(User.address)) == ['0x1', '0x2']
+
+def test_rows_are_inserted_in_chunks(app, monkeypatch):
+    monkeypatch.setattr(ingestion, 'INSERT_CHUNK_SIZE', 2)
+
+    insert_ignoring_conflicts(User, [{'address': f'0x{i}'} for i in range(5)] + [{'address': '0x0'}], ['address'])
+    db.session.commit()
+
+    assert User.query.count() == 5
+
+def test_fallback_for_dialects_without_on_conflict(app, monkeypatch):
+    db.session.add(User(address='0x1'))
+    db.session.commit()
+    bind = db.session.get_bind()
+    monkeypatch.setattr(bind.dialect, 'name', 'mysql')
+
+    insert_ignoring_conflicts(User, [{'address': '0x1'}, {'address': '0x2'}, {'address': '0x2'}], ['address'])
+    db.session.commit()
+
+    assert sorted(address for address, in db.session.query(User.address)) == ['0x1', '0x2']
+
+def test_upsert_users_returns_ids_of_new_and_existing_users(app):
+    existing = User(address='0x1')
+    db.session.add(existing)
+    db.session.commit()
+
+    users = upsert_users(['0x1', '0x2', '0x2'])
+
+    assert set(users) == {'0x1', '0x2'}
+    assert users['0x1'] == existing.id
+    assert User.query.count() == 2
+
+def test_replayed_transactions_are_ignored(assets):
+    rows = [transaction(assets, '0x' + '01' * 32), transaction(assets, '0x' + '02' * 32, address='0x' + 'bb' * 20)]
+    insert_transactions(rows)
+    db.session.commit()
+
+    insert_transactions(rows + [transaction(assets, '0x' + '03' * 32)])
+    db.session.commit()
+
+    assert Transaction.query.count() == 3
+    assert User.query.count() == 2
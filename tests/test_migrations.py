@@ -0,0 +1,36 @@
+from sqlalchemy import text
+
+from app import db
+from app.models.migrations import pending_upgrades, remove_duplicates, upgrade_schema
+
+def insert_duplicate_transactions(assets):
+    user_id = db.session.execute(text("INSERT INTO users (address) VALUES ('0x1') RETURNING id")).scalar()
+    for block_number in (1, 2):
+        db.session.execute(text(
+            "INSERT INTO transactions (user_id, asset_id, tx_type, amount, interest_amount, tx_hash, block_number) "
+            "VALUES (:user_id, :asset_id, 'deposit', 1, 0, '0xdup', :block_number)"
+        ), {'user_id': user_id, 'asset_id': assets['ETH'].id, 'block_number': block_number})
+    db.session.commit()
+
+def test_fresh_database_has_no_pending_upgrades(app):
+    assert pending_upgrades(db.engine, db.metadata) == []
+
+def test_missing_indexes_are_created(app):
+    with db.engine.begin() as conn:
+        conn.execute(text('DROP INDEX ix_transactions_user_block_id'))
+
+    assert pending_upgrades(db.engine, db.metadata) == [('index', 'transactions', 'ix_transactions_user_block_id')]
+    assert upgrade_schema(db.engine, db.metadata) == ['ix_transactions_user_block_id']
+    assert pending_upgrades(db.engine, db.metadata) == []
+
+def test_unique_index_stays_pending_until_duplicates_are_removed(app, assets):
+    with db.engine.begin() as conn:
+        conn.execute(text('DROP INDEX uq_transactions_tx_hash'))
+    insert_duplicate_transactions(assets)
+
+    assert upgrade_schema(db.engine, db.metadata) == []
+    assert pending_upgrades(db.engine, db.metadata) == [('index', 'transactions', 'uq_transactions_tx_hash')]
+
+    assert remove_duplicates(db.engine, db.metadata)['uq_transactions_tx_hash'] == 1
+    assert pending_upgrades(db.engine, db.metadata) == []
+    assert db.session.execute(text('SELECT block_number FROM transactions')).scalars().all() == [1]
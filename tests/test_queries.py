@@ -0,0 +1,72 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from app import db
+from app.models.models import Transaction, User
+from app.models.queries import get_user_transactions, iter_user_transactions
+
+ADDRESS = '0x' + 'aa' * 20
+
+@pytest.fixture
+def history(assets):
+    """Seven transactions of one user, several sharing a block; returns the user id"""
+    user = User(address=ADDRESS)
+    db.session.add(user)
+    db.session.flush()
+    for i, block_number in enumerate((5, 5, 5, 7, 7, 9, 12)):
+        db.session.add(Transaction(
+            user_id=user.id,
+            asset_id=assets['DAI' if i % 3 == 0 else 'ETH'].id,
+            tx_type='borrow' if i % 2 else 'deposit',
+            amount=Decimal(i + 1),
+            tx_hash='0x' + '%064x' % i,
+            block_number=block_number,
+            timestamp=datetime(2024, 1, 1)
+        ))
+    db.session.commit()
+    return user.id
+
+def test_pages_cover_every_row_once_newest_first(history):
+    seen = []
+    before = None
+    while True:
+        rows = get_user_transactions(history, before=before, limit=2)
+        seen.extend((row.block_number, row.id) for row in rows)
+        if len(rows) < 2:
+            break
+        before = (rows[-1].block_number, rows[-1].id)
+
+    assert seen == sorted(seen, reverse=True)
+    assert len(set(seen)) == Transaction.query.count()
+
+def test_pages_respect_filters(history, assets):
+    rows = list(iter_user_transactions(history, asset_id=assets['ETH'].id, tx_types=['borrow'], batch_size=1))
+
+    assert {(row.symbol, row.tx_type) for row in rows} == {('ETH', 'borrow')}
+    assert len(rows) == Transaction.query.filter_by(asset_id=assets['ETH'].id, tx_type='borrow').count()
+
+def test_history_endpoint_follows_next_cursor(client, history):
+    ids = []
+    url = f'/api/users/{ADDRESS}/transactions?limit=3'
+    while url:
+        body = client.get(url).get_json()
+        ids.extend(row['id'] for row in body['transactions'])
+        url = body['nextCursor'] and f"/api/users/{ADDRESS}/transactions?limit=3&cursor={body['nextCursor']}"
+
+    expected = Transaction.query.order_by(Transaction.block_number.desc(), Transaction.id.desc())
+    assert ids == [transaction.id for transaction in expected]
+
+@pytest.mark.parametrize('query, error', [
+    ('limit=abc', 'Limit must be an integer'),
+    ('limit=0', 'Limit must be positive'),
+    ('cursor=5', 'Invalid cursor'),
+    ('cursor=a:b', 'Invalid cursor'),
+    ('type=mint', 'Unknown transaction types: mint'),
+])
+def test_history_endpoint_rejects_bad_parameters(client, history, query, error):
+    response = client.get(f'/api/users/{ADDRESS}/transactions?{query}')
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': error}
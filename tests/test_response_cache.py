@@ -0,0 +1,70 @@
+import pytest
+from sqlalchemy import event
+
+from app import db
+
+TOKEN = '0x' + '11' * 20
+
+@pytest.fixture
+def pool(node, assets, shared_web3_service):
+    """Fake pool views; symbols in `failing` revert on getAssetPrice"""
+    failing = set()
+
+    def price(args, block):
+        if args[0] in failing:
+            raise ValueError('price feed unavailable')
+        return 200000000000
+
+    node.views['getAssetDetails'] = lambda args, block: (TOKEN, 1000, 400)
+    node.views['getCurrentInterestRate'] = lambda args, block: 250
+    node.views['getAssetPrice'] = price
+    shared_web3_service.block_poll_interval = 0
+    return failing
+
+def price_calls(node):
+    return sum(1 for name, _, _ in node.calls if name == 'getAssetPrice')
+
+def test_assets_are_cached_within_a_block(client, node, pool):
+    first = client.get('/api/assets')
+    second = client.get('/api/assets')
+
+    assert [asset['symbol'] for asset in second.get_json()] == ['ETH', 'DAI']
+    assert second.get_data() == first.get_data()
+    assert price_calls(node) == 2
+    assert client.get('/api/assets', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    node.block_number += 1
+    client.get('/api/assets')
+    assert price_calls(node) == 4
+
+def test_degraded_assets_list_is_not_cached(client, node, pool):
+    pool.add('DAI')
+
+    response = client.get('/api/assets')
+    assert [asset['symbol'] for asset in response.get_json()] == ['ETH']
+    assert 'ETag' not in response.headers
+
+    pool.clear()
+    response = client.get('/api/assets')
+    assert [asset['symbol'] for asset in response.get_json()] == ['ETH', 'DAI']
+    assert 'ETag' in response.headers
+
+def test_failed_asset_is_not_cached(client, node, pool):
+    pool.add('ETH')
+
+    assert client.get('/api/assets/ETH').status_code == 500
+
+    pool.clear()
+    assert client.get('/api/assets/ETH').status_code == 200
+
+def test_assets_are_served_from_the_registry(client, node, pool):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        response = client.get('/api/assets/ETH')
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert response.get_json()['symbol'] == 'ETH'
+    assert not any('FROM assets' in statement for statement in statements)
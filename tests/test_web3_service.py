@@ -0,0 +1,125 @@
+from web3 import Web3
+from web3.exceptions import ContractLogicError
+
+from app.services.web3_service import Web3Service
+
+USER = Web3.to_checksum_address('0x' + 'aa' * 20)
+
+def position(deposited=0, borrowed=0, available=0, balance=None, collateral_factor=7500):
+    return {
+        'deposited': deposited,
+        'borrowed': borrowed,
+        'available': available,
+        'balance': balance,
+        'collateral_factor': collateral_factor
+    }
+
+class TestBatchCall:
+    def test_decodes_each_result_in_one_batch(self, web3_service, node):
+        node.views['getUserPosition'] = lambda args, block: (500, 100, 3)
+        node.views['getAllAssetSymbols'] = lambda args, block: ['ETH', 'DAI']
+        functions = web3_service.contract.functions
+
+        results = web3_service._batch_call([functions.getUserPosition(USER, 'ETH'), functions.getAllAssetSymbols()])
+
+        assert results == [[500, 100, 3], ['ETH', 'DAI']]
+        assert node.requests == ['eth_call', 'eth_call']
+
+    def test_reverted_call_does_not_fail_the_batch(self, web3_service, node):
+        def details(args, block):
+            if args[0] == 'BAD':
+                raise ValueError('Asset does not exist')
+            return ('0x' + '11' * 20, 1000, 400)
+        node.views['getAssetDetails'] = details
+        functions = web3_service.contract.functions
+
+        good, bad = web3_service._batch_call([functions.getAssetDetails('ETH'), functions.getAssetDetails('BAD')])
+
+        assert good[1:] == [1000, 400]
+        assert isinstance(bad, ContractLogicError)
+        assert 'Asset does not exist' in str(bad)
+
+    def test_missing_reply_is_an_error(self, web3_service, node, monkeypatch):
+        node.views['getAllAssetSymbols'] = lambda args, block: ['ETH']
+        batch = node.make_batch_request
+        monkeypatch.setattr(node, 'make_batch_request', lambda payload: batch(payload)[:1])
+        functions = web3_service.contract.functions
+
+        first, second = web3_service._batch_call([functions.getAllAssetSymbols(), functions.getAllAssetSymbols()])
+
+        assert first == ['ETH']
+        assert isinstance(second, ValueError)
+
+    def test_block_number_is_sent_as_hex(self, web3_service, node):
+        node.views['userPositions'] = lambda args, block: (1, 2, 3, 4)
+
+        assert web3_service.get_position_states([(USER, 'ETH')], 39) == [[1, 2, 3, 4]]
+        assert node.calls[-1][2] == 39
+
+    def test_falls_back_to_sequential_calls_without_batch_support(self, web3_service, node):
+        node.batch_support = False
+        node.views['userPositions'] = lambda args, block: (7, 0, 0, 0)
+        node.views['assets'] = lambda args, block: ('0x' + '00' * 20, '0x' + '00' * 20, 18, 0, 0, 0, 0, 0, False)
+        functions = web3_service.contract.functions
+
+        results = web3_service._batch_call([functions.userPositions(USER, 'ETH'), functions.assets('ETH')], 5)
+
+        assert results[0] == [7, 0, 0, 0]
+        assert results[1][2] == 18
+        assert [call[2] for call in node.calls] == [5, 5]
+
+    def test_transient_failure_is_returned_for_every_call(self, web3_service, node, monkeypatch):
+        def unreachable(payload):
+            raise ConnectionError('node down')
+        monkeypatch.setattr(node, 'make_batch_request', unreachable)
+        web3_service.retry_policy.max_attempts = 1
+        functions = web3_service.contract.functions
+
+        results = web3_service._batch_call([functions.getAllAssetSymbols(), functions.getAllAssetSymbols()])
+
+        assert all(isinstance(result, ConnectionError) for result in results)
+        assert node.calls == []
+
+class TestApplyOperation:
+    def test_deposit_spends_the_token_balance(self):
+        state = position(balance=10)
+
+        assert Web3Service._apply_operation(state, 'deposit', 4) is None
+        assert (state['balance'], state['deposited'], state['available']) == (6, 4, 4)
+        assert Web3Service._apply_operation(state, 'deposit', 7) == "Insufficient token balance"
+
+    def test_balance_is_not_checked_when_unknown(self):
+        state = position()
+
+        assert Web3Service._apply_operation(state, 'deposit', 10**30) is None
+        assert state['balance'] is None
+
+    def test_withdraw_keeps_the_position_healthy(self):
+        state = position(deposited=100, borrowed=60, available=40, balance=0)
+
+        assert Web3Service._apply_operation(state, 'withdraw', 200) == "Insufficient balance"
+        assert Web3Service._apply_operation(state, 'withdraw', 30) == "Withdrawal would cause unhealthy position"
+        assert Web3Service._apply_operation(state, 'withdraw', 20) is None
+        assert (state['deposited'], state['available'], state['balance']) == (80, 20, 20)
+
+    def test_borrow_checks_health_and_liquidity(self):
+        state = position(deposited=100, available=50, balance=0)
+
+        assert Web3Service._apply_operation(state, 'borrow', 80) == "Borrow would cause unhealthy position"
+        assert Web3Service._apply_operation(state, 'borrow', 60) == "Insufficient liquidity in pool"
+        assert Web3Service._apply_operation(state, 'borrow', 50) is None
+        assert (state['borrowed'], state['available'], state['balance']) == (50, 0, 50)
+
+    def test_borrowed_tokens_can_be_repaid(self):
+        state = position(deposited=100, available=100, balance=0)
+
+        assert Web3Service._apply_operation(state, 'borrow', 40) is None
+        assert Web3Service._apply_operation(state, 'repay', 40) is None
+        assert (state['borrowed'], state['available'], state['balance']) == (0, 100, 0)
+
+    def test_repay_is_capped_at_the_debt(self):
+        state = position(deposited=100, borrowed=30, available=70, balance=100)
+
+        assert Web3Service._apply_operation(state, 'repay', 50) is None
+        assert (state['borrowed'], state['available'], state['balance']) == (0, 100, 70)
+        assert Web3Service._apply_operation(state, 'repay', 1) == "No outstanding borrow"
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Bring an existing database up to date with the models: adds columns and indexes introduced
+after its tables were created and drops superseded indexes. The app refuses to start until
+this has run. Unique indexes blocked by duplicate rows stay pending; remove those rows with
+dedupe_database.py first.
+"""
+
+import os
+import sys
+import argparse
+import logging
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db
+from app.models.migrations import pending_upgrades, describe_upgrade, upgrade_schema
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('upgrade_database.log'),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger('upgrade_database')
+
+def upgrade_database(dry_run=False):
+    """Apply pending schema upgrades; returns True when none remain"""
+    app = create_app(check_schema=False)
+    with app.app_context():
+        try:
+            if dry_run:
+                pending = pending_upgrades(db.engine, db.metadata)
+                logger.info(f"Pending schema upgrades: {[describe_upgrade(u) for u in pending] or 'none'}")
+                return not pending
+            
+            applied = upgrade_schema(db.engine, db.metadata)
+            logger.info(f"Applied schema upgrades: {applied or 'none'}")
+            
+            remaining = pending_upgrades(db.engine, db.metadata)
+            if remaining:
+                logger.error(f"Schema upgrades still pending: {[describe_upgrade(u) for u in remaining]}")
+                return False
+            return True
+        except Exception as e:
+            logger.error(f"Error upgrading database schema: {str(e)}")
+            return False
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--dry-run', action='store_true', help='List pending upgrades without changing anything')
+    args = parser.parse_args()
+    sys.exit(0 if upgrade_database(dry_run=args.dry_run) else 1)